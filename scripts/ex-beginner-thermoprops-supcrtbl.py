@@ -11,35 +11,23 @@
 #       jupytext_version: 1.13.1
 # ---
 
-from reaktoro import *
 from matplotlib import pyplot as plt
 import numpy as npy
 
-db_bl = SupcrtDatabase("supcrtbl")
-db_98 = SupcrtDatabase("supcrt98")
+from sweeps import standard_properties
 
-H2Og_bl = db_bl.species().get("H2O(g)")
-H2Og_98 = db_98.species().get("H2O(g)")
-
-CO2g_bl = db_bl.species().get("CO2(g)")
-CO2g_98 = db_98.species().get("CO2(g)")
-
-H2Sg_bl = db_bl.species().get("H2S(g)")
-H2Sg_98 = db_98.species().get("H2S(g)")
+species = ["H2O(g)", "CO2(g)", "H2S(g)"]
 
 P = 80.0
+T = npy.arange(25.0, 105.0, 5.0)
+
+# G0 (kJ/mol) of every species at every temperature, one row per species
+G0_bl = standard_properties("supcrtbl", species, T + 273.15, P*1e5, ["G0"])["G0"]/1000
+G0_98 = standard_properties("supcrt98", species, T + 273.15, P*1e5, ["G0"])["G0"]/1000
 
-data = []
-for T in npy.arange(25.0, 105.0, 5.0):
-    G0_H2Og_bl = H2Og_bl.props(T+273.15, P*1e5).G0[0]/1000
-    G0_H2Og_98 = H2Og_98.props(T+273.15, P*1e5).G0[0]/1000
-    G0_CO2g_bl = CO2g_bl.props(T+273.15, P*1e5).G0[0]/1000
-    G0_CO2g_98 = CO2g_98.props(T+273.15, P*1e5).G0[0]/1000
-    G0_H2Sg_bl = H2Sg_bl.props(T+273.15, P*1e5).G0[0]/1000
-    G0_H2Sg_98 = H2Sg_98.props(T+273.15, P*1e5).G0[0]/1000
-    data.append([T, G0_H2Og_bl, G0_H2Og_98, G0_CO2g_bl, G0_CO2g_98, G0_H2Sg_bl, G0_H2Sg_98])
-
-data = npy.array(data)
+G0_H2Og_bl, G0_CO2g_bl, G0_H2Sg_bl = G0_bl
+G0_H2Og_98, G0_CO2g_98, G0_H2Sg_98 = G0_98
+data = npy.array([T, G0_H2Og_bl, G0_H2Og_98, G0_CO2g_bl, G0_CO2g_98, G0_H2Sg_bl, G0_H2Sg_98]).T
 
 print(data)
 
@@ -14,6 +14,8 @@
 from reaktoro import *
 import numpy as np
 
+from sweeps import SystemDefinition, setup_for
+
 # Function to calculate equilibrium of the carbonates and seawater
 def carbonates_in_seawater(system, solver, T, P):
 
@@ -59,30 +61,17 @@ def carbonates_in_seawater(system, solver, T, P):
 
     return (nCalcite[0], nDolomite[0], nCa2[0], nMg2[0], nH[0], nHCO3[0])
 
-# Initialize a thermodynamic database
-db = PhreeqcDatabase("pitzer.dat")
-
-# Create an aqueous phase automatically selecting all species with provided elements
-aqueousphase = AqueousPhase(speciate("H O C Ca Cl Na K Mg S Si"))
-aqueousphase.setActivityModel(chain(
-    ActivityModelPitzerHMW()
-))
-
-# Create carbonates phases
-calcitephase = MineralPhase("Calcite")
-dolomitephase = MineralPhase("Dolomite")
-
-# Collecting all above-defined phases
-phases = Phases(db)
-phases.add(aqueousphase)
-phases.add(calcitephase)
-phases.add(dolomitephase)
-
-# Construct the chemical system
-system = ChemicalSystem(phases)
-
-# Create the equilibrium solver
-solver = EquilibriumSolver(system)
+# Define the chemical system: an aqueous phase with all species of the provided elements (Pitzer)
+# and the Calcite and Dolomite phases, from the pitzer.dat database, equilibrated at given
+# temperature and pressure
+definition = SystemDefinition("pitzer.dat", "H O C Ca Cl Na K Mg S Si",
+                              minerals="Calcite Dolomite",
+                              activity_models=("PitzerHMW",),
+                              specs=("temperature", "pressure"))
+
+# Construct the chemical system and the equilibrium solver, or reuse them if this cell ran before
+setup = setup_for(definition)
+system, solver = setup.system, setup.solver
 
 # Define the range of temperatures and pressure for the equilibrium calculations
 T = np.arange(25.0, 91.0, 5.0)
@@ -14,67 +14,32 @@
 from reaktoro import *
 import numpy as np
 
-# Function to calculate solubility of CO2 in the NaCl-brine
-def solubility_co2(system, solver, T, P, mNaCl):
+from sweeps import SystemDefinition, setup_for, solubility_table
 
-    # Initial amount of CO2 gas
-    n0CO2g = 10.0
+# Define the chemical system: an aqueous phase with all species of the provided elements (HKF with
+# Drummond for CO2) and a CO2(g) gaseous phase (Peng-Robinson), from the phreeqc.dat database,
+# equilibrated at given temperature and pressure
+definition = SystemDefinition("phreeqc.dat", "H O C Na Cl", gases="CO2(g)",
+                              activity_models=("HKF", "Drummond CO2"),
+                              gas_activity_model="PengRobinson",
+                              specs=("temperature", "pressure"))
 
-    # Define initial chemical state corresponding to the NaCl-brine of the given concentration
-    state = ChemicalState(system)
-    state.setTemperature(T, "celsius")
-    state.setPressure(P, "bar")
-    state.setSpeciesMass("H2O", 1.0, "kg")
-    state.setSpeciesAmount("CO2(g)", n0CO2g, "mol")
-    state.setSpeciesAmount("Na+", mNaCl, "mol")
-    state.setSpeciesAmount("Cl-", mNaCl, "mol")
+# Construct the chemical system and the equilibrium solver, or reuse them if this cell ran before
+setup = setup_for(definition)
+system, solver = setup.system, setup.solver
 
-    # Calculate equilibrium state
-    res = solver.solve(state)
-
-    # Throw exception if the equilibrium couldn't be found
-    if not res.optima.succeeded:
-        raise RuntimeError("Equilibrium calculation did not succeed!")
-
-    # Fetch resulting aqueous properties of the chemical state
-    aqprops = AqueousProps(state)
-
-    # Return concentration of the carbon in the aqueous phase
-    return aqprops.elementMolality("C")[0]
-
-# Initialize a thermodynamic database
-db = PhreeqcDatabase("phreeqc.dat")
-
-# Create an aqueous phase automatically selecting all species with provided elements
-aqueousphase = AqueousPhase(speciate("H O C Na Cl"))
-aqueousphase.setActivityModel(chain(
-    ActivityModelHKF(),
-    ActivityModelDrummond("CO2"),
-))
-
-# Create a gaseous phase
-gaseousphase = GaseousPhase("CO2(g)")
-gaseousphase.setActivityModel(ActivityModelPengRobinson())
-
-# Collecting all above-defined phases
-phases = Phases(db)
-phases.add(aqueousphase)
-phases.add(gaseousphase)
-
-# Construct the chemical system
-system = ChemicalSystem(phases)
-
-# Create the equilibrium solver
-solver = EquilibriumSolver(system)
-
-# Define the range of temperatures and pressure for the equilibrium calculations
+# Define the range of temperatures, the pressure and the NaCl molalities of the brines
 T = np.arange(25.0, 90.0, 5.0)
 P = 100.0
-
-# Calculate CO2 solubilities for the range of the temperatures and different brine concentrations
-mCO2_1 = [solubility_co2(system, solver, x, P, mNaCl=1.0) for x in T]
-mCO2_2 = [solubility_co2(system, solver, x, P, mNaCl=2.0) for x in T]
-mCO2_3 = [solubility_co2(system, solver, x, P, mNaCl=4.0) for x in T]
+mNaCl = [1.0, 2.0, 4.0]
+
+# Calculate the CO2 solubilities (molality of carbon in the aqueous phase after equilibrating 1 kg of
+# brine with 10 mol of CO2 gas) for all temperatures and brines at once; the table has one axis per
+# argument, here of shape (len(T), 1, len(mNaCl)), and is NaN where the equilibrium couldn't be found
+table = solubility_table(setup, T, [P], mNaCl, gas="CO2(g)", gas_amount=10.0, ions=("Na+", "Cl-"))
+if not table.converged.all():
+    raise RuntimeError("Equilibrium calculation did not succeed!")
+mCO2_1, mCO2_2, mCO2_3 = table["molalC"][:, 0, :].T
 
 # Output the results
 print(" ----------------------------------------------------------------")
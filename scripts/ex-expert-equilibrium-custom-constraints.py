@@ -13,6 +13,8 @@
 
 from reaktoro import *
 
+from sweeps import constraints
+
 
 db = SupcrtDatabase("supcrtbl")
 
@@ -47,25 +49,17 @@ Ux = propsx.internalEnergy()
 statex.output("state-expected.txt")
 propsx.output("props-expected.txt")
 
-specs = EquilibriumSpecs(system)
-
-idxV = specs.addInput("V")
-idxU = specs.addInput("U")
+# Fix volume and internal energy (temperature and pressure become unknowns). These are
+# native constraints of EquilibriumSpecs, so the solver evaluates them without calling Python.
+volumeConstraint = constraints.volume("m3")
+internalEnergyConstraint = constraints.internal_energy("J")
 
-volumeConstraint = ConstraintEquation()
-volumeConstraint.id = "VolumeConstraint"
-volumeConstraint.fn = lambda props, w: props.volume() - w[idxV]
-
-internalEnergyConstraint = ConstraintEquation()
-internalEnergyConstraint.id = "InternalEnergyConstraint"
-internalEnergyConstraint.fn = lambda props, w: props.internalEnergy() - w[idxU]
-
-specs.addConstraint(volumeConstraint)
-specs.addConstraint(internalEnergyConstraint)
+specs = EquilibriumSpecs(system)
+constraints.add(specs, [volumeConstraint, internalEnergyConstraint])
 
 conditions = EquilibriumConditions(specs)
-conditions.set("V", Vx)
-conditions.set("U", Ux)
+volumeConstraint.set(conditions, Vx)
+internalEnergyConstraint.set(conditions, Ux)
 conditions.setLowerBoundPressure(1.0, "bar")
 
 state = ChemicalState(system)
@@ -14,6 +14,8 @@
 from reaktoro import *
 from autodiff import abs
 
+from sweeps import ConstraintProfiler, constraints
+
 
 T = 60.0 + 273.15 # temperature in K
 P = 10.0 * 1e5    # pressure in Pa
@@ -47,21 +49,22 @@ system = ChemicalSystem(db, solution, mineral)
 
 solubilityCaCO3 = computeSolubilityCaCO3(system)
 
-constraint = ConstraintEquation()
-constraint.id = "solubility[CaCO3]"
-
-aprops = AqueousProps(system)
-def fn(props, w):
-    aprops.update(props)
-    return aprops.elementMolality("Ca") - solubilityCaCO3
-
-constraint.fn = fn
+# The molality of Ca is fixed to the solubility computed above, which determines the unknown G0 of calcite
+solubility = constraints.element_molality("Ca")
 
 specs = EquilibriumSpecs(system)
 specs.temperature()
 specs.pressure()
 specs.addUnknownStandardChemicalPotential("Calcite")
-specs.addConstraint(constraint)
+
+# The profiler counts the calls of the constraint function and their time during the solves it runs
+profiler = ConstraintProfiler()
+constraints.add(specs, [solubility], profiler=profiler)
+
+conditions = EquilibriumConditions(specs)
+conditions.temperature(T)
+conditions.pressure(P)
+solubility.set(conditions, solubilityCaCO3[0])
 
 state = ChemicalState(system)
 state.setTemperature(T)
@@ -71,7 +74,7 @@ state.set("Calcite", 10.0, "mol")
 
 solver = EquilibriumSolver(specs)
 
-solver.solve(state)
+profiler.solve(solver, state, conditions)
 
 G0_calcite_expected = system.species().get("Calcite").props(T, P).G0
 G0_calcite_computed = state.equilibrium().p()[0]
@@ -83,3 +86,33 @@ print(f"expected: {G0_calcite_expected/1000.0} kJ/mol")
 print(f"computed: {G0_calcite_computed/1000.0} kJ/mol")
 print(f"   error: {abs((G0_calcite_computed - G0_calcite_expected)/G0_calcite_expected) * 100.0} %")
 print(f"=================================")
+
+# For comparison, the same constraint computed by updating AqueousProps in every call
+aprops = AqueousProps(system)
+def fn(props, w):
+    aprops.update(props)
+    return aprops.elementMolality("Ca") - solubilityCaCO3
+
+constraint = ConstraintEquation()
+constraint.id = "solubility[CaCO3] (AqueousProps)"
+constraint.fn = fn
+
+specs_aprops = EquilibriumSpecs(system)
+specs_aprops.temperature()
+specs_aprops.pressure()
+specs_aprops.addUnknownStandardChemicalPotential("Calcite")
+
+profiler_aprops = ConstraintProfiler()
+profiler_aprops.add(specs_aprops, constraint)
+
+state = ChemicalState(system)
+state.setTemperature(T)
+state.setPressure(P)
+state.set("H2O(aq)", 1.0, "kg")
+state.set("Calcite", 10.0, "mol")
+
+profiler_aprops.solve(EquilibriumSolver(specs_aprops), state)
+
+print("Time in the constraint function:")
+profiler.print_report()
+profiler_aprops.print_report()
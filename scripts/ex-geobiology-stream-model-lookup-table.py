@@ -0,0 +1,62 @@
+# ---
+# jupyter:
+#   jupytext:
+#     cell_metadata_filter: -all
+#     formats: notebooks//ipynb,py:light
+#     text_representation:
+#       extension: .py
+#       format_name: light
+#       format_version: '1.5'
+#       jupytext_version: 1.13.1
+# ---
+
+import numpy as np
+import os
+
+from sweeps import (SystemDefinition, InitialState, Grid, Axis, Sweep, ResultCache, ResultStore,
+                    temperature, pressure, log_fugacity, pH, species_amount, element_amount_in_phase,
+                    build_lookup)
+
+results_folder = 'results-stream-model-lookup-table'
+os.system('mkdir -p ' + results_folder)
+
+# The system of ex-geobiology-stream-model.py
+definition = SystemDefinition('databases/phreeqc-extended.dat', "H O C Na Cl Ca P",
+                              minerals="Fluorapatite Hydroxylapatite Calcite")
+
+initial = InitialState({
+    "H2O":             (1.0, "kg"),
+    "Calcite":         (10.00, "mol"),
+    "Fluorapatite":    (10.00, "mol"),
+    "Hydroxylapatite": (10.00, "mol"),
+})
+
+# Lookup table for the transport model: pH, dissolved P and the mineral amounts
+# as functions of (T, ppCO2), starting from a coarse grid that is refined where
+# multilinear interpolation misses the tolerances. The transport code reads
+# lookup.npz with sweeps.LookupTable.load (or plain numpy.load) and calls
+# table.interpolate(points) instead of solving equilibrium.
+extractors = [pH(),
+              element_amount_in_phase("P", name="P"),
+              species_amount("Calcite"),
+              species_amount("Fluorapatite"),
+              species_amount("Hydroxylapatite")]
+coarse = Grid(Axis("T", np.linspace(0, 50.0, num=11), temperature("celsius")),
+              Axis("ppCO2", np.linspace(-4.1, 0.1, num=15), log_fugacity("CO2", "bar")),
+              fixed=[(pressure("atm"), 1.0)])
+sweep = Sweep(definition, coarse, extractors, initial, warm_start=True,
+              cache=ResultCache(results_folder + '/cache.sqlite'))
+table = build_lookup(sweep, tolerances={"pH": 0.005, "P": 1e-7},
+                     min_spacing={"T": 0.25, "ppCO2": 0.01})
+table.save(results_folder + '/lookup.npz')
+print(f"Lookup table of {table.shape} points, largest estimated errors:",
+      dict(zip(table.quantities, table.error.reshape(len(table.quantities), -1).max(axis=1))))
+
+# Check the table against the full grid of ex-geobiology-stream-model.py, if it has been run
+stream_model = 'results-stream-model/stream-model.store'
+if os.path.exists(stream_model):
+    store = ResultStore.open(stream_model)
+    pHs = store.read("pH")
+    points = np.stack(np.meshgrid(store.axis("T"), store.axis("ppCO2"), indexing="ij"), axis=-1).reshape(-1, 2)
+    pH_table = table.interpolate(points, ["pH"]).reshape(pHs.shape)
+    print("Largest pH error of the lookup table on the full grid:", np.nanmax(np.abs(pH_table - pHs)))
@@ -0,0 +1,61 @@
+# ---
+# jupyter:
+#   jupytext:
+#     cell_metadata_filter: -all
+#     formats: notebooks//ipynb,py:light
+#     text_representation:
+#       extension: .py
+#       format_name: light
+#       format_version: '1.5'
+#       jupytext_version: 1.13.1
+# ---
+
+import numpy as np
+import os
+
+from sweeps import (SystemDefinition, InitialState, Grid, Axis, Sweep, ResultCache,
+                    temperature, pressure, log_fugacity, pH, species_amount, element_amount_in_phase,
+                    train_surrogate, SurrogateSolver)
+
+results_folder = 'results-stream-model-surrogate'
+os.system('mkdir -p ' + results_folder)
+
+# The system of ex-geobiology-stream-model.py
+definition = SystemDefinition('databases/phreeqc-extended.dat', "H O C Na Cl Ca P",
+                              minerals="Fluorapatite Hydroxylapatite Calcite")
+
+initial = InitialState({
+    "H2O":             (1.0, "kg"),
+    "Calcite":         (10.00, "mol"),
+    "Fluorapatite":    (10.00, "mol"),
+    "Hydroxylapatite": (10.00, "mol"),
+})
+
+extractors = [pH(),
+              element_amount_in_phase("P", name="P"),
+              species_amount("Calcite"),
+              species_amount("Fluorapatite"),
+              species_amount("Hydroxylapatite")]
+
+# Surrogate model for the coupled transport runs: a regression of pH, dissolved
+# P and the mineral amounts trained on a 26 x 22 sweep, checked against held-out
+# solves. Points outside (0..50 C, -4.1..0.1) or where the surrogate is not
+# accurate enough are solved with Reaktoro instead.
+training_grid = Grid(Axis("T", np.linspace(0, 50.0, num=26), temperature("celsius")),
+                     Axis("ppCO2", np.linspace(-4.1, 0.1, num=22), log_fugacity("CO2", "bar")),
+                     fixed=[(pressure("atm"), 1.0)])
+training_sweep = Sweep(definition, training_grid, extractors, initial, warm_start=True,
+                       cache=ResultCache(results_folder + '/cache.sqlite'))
+surrogate = train_surrogate(training_sweep.run(), basis="rbf", centers=12, log=("P",))
+solver = SurrogateSolver(surrogate, training_sweep, tolerances={"pH": 0.01, "P": 1e-7})
+for quantity, check in solver.validate(100).items():
+    print(f"Surrogate {quantity}: max error {check['max_error']:.3g}, rms error {check['rms_error']:.3g}, "
+          f"uncertainty scaled by {check['scale']:.2f}")
+surrogate.save(results_folder + '/surrogate.npz')
+
+# Queries as a transport step would send them, some outside the trained temperatures
+rng = np.random.default_rng(1)
+points = np.column_stack((rng.uniform(0.0, 55.0, 500), rng.uniform(-4.1, 0.1, 500)))
+values, solved = solver.evaluate(points)
+print(f"Surrogate answered {100 * (1 - solved.mean()):.1f}% of {len(points)} queries, "
+      f"{solved.sum()} were solved with Reaktoro")
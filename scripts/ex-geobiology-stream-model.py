@@ -10,64 +10,30 @@
 #       jupytext_version: 1.13.1
 # ---
 
-from reaktoro import *
 import numpy as np
 import os
 
+from sweeps import (SystemDefinition, InitialState, Grid, Axis, Sweep, ResultCache,
+                    temperature, pressure, log_fugacity, pH, species_amount, run_streaming,
+                    print_solver_summary)
+
 results_folder = 'results-stream-model'
 os.system('mkdir -p ' + results_folder)
 
-db = PhreeqcDatabase.fromFile('databases/phreeqc-extended.dat') # if running from tutorials folder
-
-# print("Database content:\n---------------------")
-# for species in db.species():
-#     print(species.name())
-
-solution = AqueousPhase(speciate("H O C Na Cl Ca P"))
-solution.setActivityModel(chain(
-    ActivityModelHKF(),
-    ActivityModelDrummond("CO2")
-))
-
-minerals = MineralPhases("Fluorapatite Hydroxylapatite Calcite")
-
-system = ChemicalSystem(db, solution, minerals)
-
-props = ChemicalProps(system)
-aprops = AqueousProps(system)
-
-specs = EquilibriumSpecs(system)
-specs.temperature()
-specs.pressure()
-specs.fugacity("CO2")
-
-solver = EquilibriumSolver(specs)
-
-conditions = EquilibriumConditions(specs)
-
-state = ChemicalState(system)
-state.set("H2O", 1.0, "kg")
-#state.set("CO2", 100.0, "mmol")
-state.set("Calcite", 10.00, "mol")
-state.set("Fluorapatite", 10.00, "mol")
-state.set("Hydroxylapatite", 10.00, "mol")
+definition = SystemDefinition('databases/phreeqc-extended.dat', "H O C Na Cl Ca P",
+                              minerals="Fluorapatite Hydroxylapatite Calcite")
 
-def equilibrate(T, ppCO2):
+initial = InitialState({
+    "H2O":             (1.0, "kg"),
+    #"CO2":            (100.0, "mmol"),
+    "Calcite":         (10.00, "mol"),
+    "Fluorapatite":    (10.00, "mol"),
+    "Hydroxylapatite": (10.00, "mol"),
+})
 
-    conditions.temperature(T, "celsius")
-    conditions.pressure(1.0, "atm")
-    conditions.fugacity("CO2", 10**(ppCO2))
-
-    solver.solve(state, conditions)
-
-    props.update(state)
-    aprops.update(state)
-    ph = aprops.pH()[0]
-
-    mPO4 = state.speciesAmount("HPO4-2")[0]
-    #mPO4 = aprops.speciesMolality("HPO4-2")[0]
-
-    return ph, mPO4
+extractors = [pH(),
+              species_amount("HPO4-2", name="mPO4")]
+              #species_molality("HPO4-2", name="mPO4")]
 
 num_temperatures = 101
 num_co2s = 106
@@ -79,21 +45,22 @@ co2ppressures = np.linspace(-4.1, 0.1, num=num_co2s)
 # temperatures = np.array([50.0])
 # co2ppressures = np.array([-4.0])
 
-data_size = 2
-data = np.zeros((data_size, num_temperatures, num_co2s))
-
-# print(temperatures)
-# print(co2ppressures)
-
-p_couter = 0
-for ppCO2 in co2ppressures:
-    data[:, :, p_couter] = np.array([equilibrate(T, ppCO2) for T in temperatures]).T
-    p_couter += 1
-pHs = data[0]
-mPO4 = data[1]
-
-np.savetxt(results_folder + '/m-pH.txt', pHs)
-np.savetxt(results_folder + '/m-mPO4.txt', mPO4)
+grid = Grid(Axis("T", temperatures, temperature("celsius")),
+            Axis("ppCO2", co2ppressures, log_fugacity("CO2", "bar")),
+            fixed=[(pressure("atm"), 1.0)])
+
+# Each point starts from the converged state of its neighbour on the grid, and
+# points solved by a previous run of the script are read back from the cache.
+# The solver statistics of every point are stored next to pH and mPO4.
+cache = ResultCache(results_folder + '/cache.sqlite')
+sweep = Sweep(definition, grid, extractors, initial, warm_start=True, cache=cache, stats=True)
+# Every temperature row is flushed to the store as soon as it is solved; rerunning
+# the script after an interruption continues from the last flushed row
+store = run_streaming(sweep, results_folder + '/stream-model.store')
+# Temperatures not solved yet (after an interruption) are NaN
+pHs = store.read("pH", num_temperatures)
+mPO4 = store.read("mPO4", num_temperatures)
+print_solver_summary(store)
 
 import matplotlib.pyplot as plt
 colors = ['C1', 'C2', 'C3', 'C4', 'C5', 'C7', 'C8', 'C9']
@@ -118,5 +85,3 @@ plt.ylabel('m (HPO4) [molal]')
 plt.grid()
 plt.savefig(results_folder + '/' + 'mHPO4-vs-T.png', bbox_inches='tight')
 plt.close()
-
-
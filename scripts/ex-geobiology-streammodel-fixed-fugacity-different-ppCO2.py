@@ -10,42 +10,20 @@
 #       jupytext_version: 1.13.1
 # ---
 
-from reaktoro import *
 import numpy as np
 import os
 
+from sweeps import (SystemDefinition, InitialState, Grid, Axis, Sweep,
+                    temperature, pressure, log_fugacity, pH, element_amount_in_phase,
+                    save_result)
+
 results_folder = 'results-streammodel-fixed-fugacity-different-ppCO2'
 os.system('mkdir -p ' + results_folder)
 
-db = PhreeqcDatabase.fromFile('databases/phreeqc-extended.dat') # if running from tutorials folder
-
-solution = AqueousPhase(speciate("H O C Na Cl Ca P"))
-solution.setActivityModel(chain(
-    ActivityModelHKF(),
-    ActivityModelDrummond("CO2")
-))
-gases = GaseousPhase("CO2(g)")
-gases.setActivityModel(ActivityModelPengRobinson())
-
-mineral = MineralPhase("Calcite Fluorapatite Hydroxylapatite")
-
-system = ChemicalSystem(db, solution, mineral, gases)
-
-aprops = AqueousProps(system)
-props = ChemicalProps(system)
-
-specs = EquilibriumSpecs(system)
-specs.temperature()
-specs.pressure()
-specs.fugacity("CO2")
-
-conditions = EquilibriumConditions(specs)
-
-solver = EquilibriumSolver(specs)
-
-opts = EquilibriumOptions()
-opts.epsilon = 1e-13
-solver.setOptions(opts)
+definition = SystemDefinition('databases/phreeqc-extended.dat', "H O C Na Cl Ca P",
+                              solid_solutions=("Calcite Fluorapatite Hydroxylapatite",),
+                              gases="CO2(g)",
+                              epsilon=1e-13)
 
 P = 1.0  # pressure in atm
 
@@ -58,28 +36,20 @@ P = 1.0  # pressure in atm
 # REACTION_TEMPERATURE 1; 0;
 # END
 
-def equilibrate(ppCO2, T):
+initial = InitialState({
+    "H2O":             (1.0, "kg"),
+    "Calcite":         (10.0, "mol"),
+    "Fluorapatite":    (10.0, "mol"),
+    "Hydroxylapatite": (10.0, "mol"),
+    "CO2":             (100.0, "mol"),
+})
 
-    conditions.temperature(T, "celsius")
-    conditions.pressure(P, "atm")
-    conditions.fugacity("CO2", 10 ** (ppCO2), 'atm')
+extractors = [pH(), element_amount_in_phase("P", "AqueousPhase", name="molP")]
 
-    state = ChemicalState(system)
-    state.set("H2O"    , 1.0 , "kg")
-    state.set("Calcite", 10.0, "mol")
-    state.set("Fluorapatite", 10.0, "mol")
-    state.set("Hydroxylapatite", 10.0, "mol")
-    state.set("CO2",  100.0, "mol")
-
-    solver.solve(state, conditions)
-
-    aprops.update(state)
-    props.update(state)
-
-    pH = aprops.pH()[0]
-    molP = props.elementAmountInPhase("P", "AqueousPhase")[0]
-
-    return pH, molP
+def ppco2_grid(temperatures, co2ppressures):
+    return Grid(Axis("T", temperatures, temperature("celsius")),
+                Axis("ppCO2", co2ppressures, log_fugacity("CO2", "atm")),
+                fixed=[(pressure("atm"), P)])
 
 ######################################################################
 num_temperatures = 3
@@ -87,37 +57,12 @@ num_ppco2s = 101
 temperatures = np.array([0, 25, 50])
 co2ppressures = np.linspace(-4.0, 0.0, num=num_ppco2s)
 
-data_size = 2
-data50 = np.zeros((num_ppco2s, data_size + 1))
-data25 = np.zeros((num_ppco2s, data_size + 1))
-data0 = np.zeros((num_ppco2s, data_size + 1))
-
-for i in range(0, num_ppco2s):
-
-    result = equilibrate(co2ppressures[i], temperatures[2])
-    data50[i, 0] = co2ppressures[i]
-    data50[i, 1] = result[0]
-    data50[i, 2] = result[1]
-
-    result = equilibrate(co2ppressures[i], temperatures[1])
-    data25[i, 0] = co2ppressures[i]
-    data25[i, 1] = result[0]
-    data25[i, 2] = result[1]
-
-    result = equilibrate(co2ppressures[i], temperatures[0])
-    data0[i, 0] = co2ppressures[i]
-    data0[i, 1] = result[0]
-    data0[i, 2] = result[1]
-
-np.savetxt(results_folder + '/m-data-25.txt', data25)
-np.savetxt(results_folder + '/m-pH-25.txt', data25[:, 1])
-np.savetxt(results_folder + '/m-mP-25.txt', data25[:, 2])
-np.savetxt(results_folder + '/m-data-50.txt', data50)
-np.savetxt(results_folder + '/m-pH-50.txt', data50[:, 1])
-np.savetxt(results_folder + '/m-mP-50.txt', data50[:, 2])
-np.savetxt(results_folder + '/m-data-0.txt', data0)
-np.savetxt(results_folder + '/m-pH-0.txt', data0[:, 1])
-np.savetxt(results_folder + '/m-mP-0.txt', data0[:, 2])
+result = Sweep(definition, ppco2_grid(temperatures, co2ppressures), extractors, initial).run()
+
+data0, data25, data50 = [np.column_stack((co2ppressures, result["pH"][i], result["molP"][i]))
+                         for i in range(num_temperatures)]
+
+save_result(result, results_folder + '/m-data.store')
 
 import matplotlib.pyplot as plt
 colors = ['C1', 'C2', 'C3', 'C4', 'C5', 'C7', 'C8', 'C9']
@@ -221,16 +166,11 @@ num_ppco2s = 101
 temperatures =  np.linspace(0.0, 50.0, num=num_temperatures)
 co2ppressures = np.linspace(-4.0, 0.0, num=num_ppco2s)
 
-data_size = 2
-data_pH = np.zeros((num_temperatures, num_ppco2s))
-data_P = np.zeros((num_temperatures, num_ppco2s))
-
-for i in range(0, num_temperatures):
-    for j in range(0, num_ppco2s):
-
-        result = equilibrate(co2ppressures[j], temperatures[i])
-        data_pH[i, j] = result[0]
-        data_P[i, j] = result[1]
+# Solve the 151 x 101 grid on all available cores
+result = Sweep(definition, ppco2_grid(temperatures, co2ppressures), extractors, initial).run(processes=None)
+data_pH = result["pH"]
+data_P = result["molP"]
+save_result(result, results_folder + '/m-data-T-ppCO2.store')
 
 import matplotlib as ml
 import matplotlib.pyplot as plt
@@ -19,16 +19,17 @@
 
 from reaktoro import *
 
-# To initialize chemical system, we have to start from defining a thermodynamic database and chemical editor (where
-# system's phases are defined):
+from sweeps import SystemDefinition, Titration
 
-db =  SupcrtDatabase("supcrt98")
-aqueousphase = AqueousPhase(speciate("H O Na Cl N"))
-aqueousphase.setActivityModel(ActivityModelHKF())
+# To initialize chemical system, we have to define a thermodynamic database and the phases of the system. Here the
+# system is described by a `SystemDefinition` (the elements of the aqueous phase and its activity model), which builds
+# the database, the chemical system and the equilibrium solver:
 
-# Construct the chemical system:
+definition = SystemDefinition("supcrt98", "H O Na Cl N", activity_models=("HKF",),
+                              specs=("temperature", "pressure"))
+setup = definition.build()
 
-system = ChemicalSystem(db, aqueousphase)
+system = setup.system
 
 for s in system.species():
     print(s.name())
@@ -45,10 +46,15 @@ state.setPressure(P, "bar")
 state.setSpeciesMass("H2O(aq)", 1.0, "kg")
 # -
 
-# We also define equilibrium solver to be used for range of equilibrium problems:
+# We also use the equilibrium solver of the setup for the range of equilibrium problems, at fixed temperature and
+# pressure:
 
-solver = EquilibriumSolver(system)
-solver.solve(state)
+conditions = setup.conditions
+conditions.temperature(T, "celsius")
+conditions.pressure(P, "bar")
+
+solver = setup.solver
+solver.solve(state, conditions)
 
 # Evaluate pH of the pute water:
 
@@ -58,75 +64,32 @@ print("pH of pure water = ", aprops.pH())
 # ### Decreasing pH
 #
 # First, we investigate the behavior of the pH when adding the acidic contaminant to the water.
-# We define the auxiliary lists with amounts of acid HCl in the chemical state `hcl_amounts` and corresponding to that
-# state list of pH `phs`. Both lists are populated in the loop of 50 steps. We gradually add 0.1 mmol of hydrogen
-# chloride and evaluate the pH in the obtained state.
+# A `Titration` adds hydrogen chloride to the water in steps of about 0.1 mmol, up to 5 mmol, starting every step
+# from the previous equilibrium. Where the pH changes by more than 0.1 in one step, the step is halved, and where it
+# barely changes the step grows, so the curve is resolved where it is steep with fewer solves than a uniform grid.
 
 # +
-# Initialize lists with HCl amounts and ph values
-hcl_initial = 0.0
-hcl_delta = 0.1
-nsteps = 50
-hcl_amounts = [hcl_initial]
-phs = [aprops.pH()[0]]
-
-# Run loop of nsteps steps
-for i in range(nsteps):
-
-    # Add more hydrogen chlorite to the problem
-    state.add("HCl(aq)", hcl_delta, "mmol")
-
-    # Equilibrate state with updated problem
-    solver.solve(state)
-
-    # Update aqueous properties
-    aprops.update(state)
+hcl_titration = Titration("HCl(aq)", step=0.1, unit="mmol", max_amount=5.0, max_dpH=0.1)
+hcl_result = hcl_titration.run(setup, state)
 
-    # Append new ph
-    phs.append(aprops.pH()[0])
-
-    # Append new hydrogen chlorite amount
-    hcl_amounts.append(hcl_amounts[-1] + hcl_delta)
+hcl_amounts = hcl_result.amounts
+phs = hcl_result["pH"]
+print(f"HCl titration: {len(hcl_result)} points from {hcl_result.solves} solves")
 # -
 
 # ### Increasing pH
 #
 # If we add in a chemical contaminant such as ammonia (a compound of nitrogen and hydrogen with the formula NH3,
-# colorless gas with a characteristic pungent smell), that can increase the pH and affect fish life.
-
-state = ChemicalState(system)
-state.setTemperature(T, "celsius")
-state.setPressure(P, "bar")
-state.setSpeciesMass("H2O(aq)", 1.0, "kg")
-solver.solve(state)
-aprops.update(state)
-
-# Define the auxiliary lists with amounts of acid HCl in the chemical state and corresponding to that state pH:
+# colorless gas with a characteristic pungent smell), that can increase the pH and affect fish life. The titration
+# starts again from the pure water (it works on a copy of `state`):
 
 # +
-nh3_initial = 0.0
-nh3_amounts = [nh3_initial]
-phs_increase = [aprops.pH()[0]]
-
-nh3_delta = 0.1
-nsteps = 50
-
-for i in range(nsteps):
-
-    # Add more ammonia to the problem
-    state.add("NH3(aq)", nh3_delta, "mmol")
-
-    # Equilibrate state with updated problem
-    solver.solve(state)
-
-    # Update aqueous properties
-    aprops.update(state)
-
-    # Append new ph
-    phs_increase.append(aprops.pH()[0])
+nh3_titration = Titration("NH3(aq)", step=0.1, unit="mmol", max_amount=5.0, max_dpH=0.1)
+nh3_result = nh3_titration.run(setup, state)
 
-    # Append new ammonia amount
-    nh3_amounts.append(nh3_amounts[-1] + nh3_delta)
+nh3_amounts = nh3_result.amounts
+phs_increase = nh3_result["pH"]
+print(f"NH3 titration: {len(nh3_result)} points from {nh3_result.solves} solves")
 # -
 
 # Let us plot pH as a function of the HCl and NH<sup>3</sup>(aq) amounts:
@@ -357,3 +357,50 @@ plt.ylabel('Amount of P [mole]')
 plt.grid()
 plt.savefig(results_folder + '/' + 'moleP-vs-ppCO2-NaHCO3_CO3_HPO4.png', bbox_inches='tight')
 plt.close()
+
+# ##########################################################
+# Stability diagram: which of the minerals above are present over T x ppCO2,
+# from one sweep with all of them in the system instead of one run per
+# commented-out state.set(...) line.
+
+from sweeps import (SystemDefinition, InitialState, Grid, Axis, map_assemblages,
+                    temperature, pressure, log_fugacity)
+
+definition = SystemDefinition('databases/phreeqc-toner-catling.dat', "H O C Na Cl Ca P",
+                              minerals="Na2(HPO4):12H2O Na2(HPO4):7H2O Na2(HPO4):2H2O Na2(HPO4) "
+                                       "Na(H2PO4):2H2O Na(H2PO4):H2O Na(H2PO4) "
+                                       "Natron Nahcolite Trona Na2CO3:H2O Na2CO3:7H2O "
+                                       "Halite",
+                              epsilon=1e-13)
+
+initial = InitialState({
+    "H2O":             (1.0, "kg"),
+    "CO2":             (100.0, "mol"),
+    "Na2(HPO4):12H2O": (10.0, "mol"),
+    "Nahcolite":       (10.0, "mol"),
+})
+
+grid = Grid(Axis("T", np.linspace(0, 50.0, num=26), temperature("celsius")),
+            Axis("ppCO2", np.linspace(-3.5, 0.0, num=15), log_fugacity("CO2", "bar")),
+            fixed=[(pressure("bar"), 1.0)])
+
+assemblages = map_assemblages(definition, grid, initial, warm_start=True)
+assemblages.save(results_folder + '/assemblages')
+# AssemblageMap.load(results_folder + '/assemblages') (from sweeps) reads it back without solving
+
+for code, count in assemblages.regions().items():
+    print(f"{count:4d} points: {assemblages.label(code)}")
+
+codes = sorted(assemblages.regions())
+plt.figure()
+plt.pcolormesh(assemblages.axis("ppCO2"), assemblages.axis("T"),
+               np.searchsorted(codes, assemblages.codes), cmap='tab20', shading='nearest')
+for (a, b), points in assemblages.boundaries().items():
+    plt.plot(points[:, 1], points[:, 0], '.', color='k', markersize=3)
+for i, code in enumerate(codes):
+    plt.plot([], [], 's', color=plt.get_cmap('tab20')(i / max(len(codes) - 1, 1)), label=assemblages.label(code))
+plt.legend(loc="upper left", bbox_to_anchor=(1.0, 1.0), fontsize='small')
+plt.xlabel('ppCO2')
+plt.ylabel('T [degC]')
+plt.savefig(results_folder + '/' + 'assemblages-T-vs-ppCO2.png', bbox_inches='tight')
+plt.close()
@@ -0,0 +1,28 @@
+# Shared helpers for the parametric equilibrium sweeps of the tutorial scripts.
+#
+# Run the scripts from the repository root (`python scripts/ex-...py`) so that
+# this package is importable next to them.
+
+from .system import SystemDefinition, EquilibriumSetup, InitialState, load_database
+from .registry import SetupRegistry, setup_for
+from .grid import Axis, Grid, temperature, pressure, log_fugacity
+from .constraints import Constraint
+from .extractors import (Extractor, Batch, extract, pH, species_amount, species_molality,
+                         element_molality, element_amount_in_phase, carbonate_ratio, assemblage)
+from .engine import Sweep, SweepResult, solve_points
+from .adaptive import AdaptiveSweep, AdaptiveResult
+from .assemblages import AssemblageMap, map_assemblages
+from .scenarios import Scenario, run_scenarios, merge_results
+from .cache import ResultCache
+from .stats import print_solver_summary
+from .profiler import ConstraintProfiler
+from .recovery import Recovery, FailureLog
+from .titration import Titration, TitrationResult
+from .solubility import solubility_table
+from .store import ResultStore, save_result, load_result
+from .streaming import run_streaming
+from .asynchronous import SweepPool
+from .thermo import standard_properties
+from .tables import Tabulation, StandardTable
+from .lookup import LookupTable, build_lookup
+from .surrogate import Surrogate, SurrogateSolver, train_surrogate
@@ -0,0 +1,122 @@
+# Adaptive sampling of one grid axis, refined where the results change abruptly.
+#
+# The phrqc2 sweeps solve 71 evenly spaced ppCO2 values although pH and the
+# carbonate ratio x only jump where the mineral assemblage switches (Nahcolite,
+# Trona, Natron). An `AdaptiveSweep` solves a coarse axis first and then, level
+# by level, only the midpoints of the intervals across which a quantity changes
+# by more than its tolerance or the `assemblage` code differs, until the
+# intervals reach `min_spacing`. Each combination of the other axes (e.g. each
+# temperature) is refined on its own, so the result has one row per
+# combination, each with its own, non-uniform values of the refined axis.
+
+import copy
+
+import numpy as np
+
+from .engine import SweepResult
+from .grid import Axis, Grid
+from .registry import setup_for
+
+
+class AdaptiveResult:
+    """The rows of an adaptive sweep.
+
+    `rows` maps the values of the other axes (a tuple, in grid order) to a 1-D
+    `SweepResult` over the refined axis; `solves` counts the points solved.
+    """
+
+    def __init__(self, axis, rows, solves):
+        self.axis = axis
+        self.rows = rows
+        self.solves = solves
+
+    def row(self, *values):
+        """Return the row whose other-axis values are closest to `values`."""
+        key = min(self.rows, key=lambda k: sum(abs(a - float(b)) for a, b in zip(k, values)))
+        return self.rows[key]
+
+
+class AdaptiveSweep:
+    """Refine the axis `axis` of the grid of `sweep` where the results jump.
+
+        adaptive = AdaptiveSweep(sweep, "ppCO2", tolerances={"pH": 0.05, "x": 1.0}, min_spacing=0.01)
+        result = adaptive.run()
+        row = result.row(25.0)
+        row.axis("ppCO2"), row["pH"]
+
+    The values of `axis` in the grid of `sweep` are the coarse starting points.
+    `tolerances` maps quantities of the sweep to the largest change accepted
+    between neighbouring points. If the sweep has an `assemblage` extractor,
+    intervals across which the assemblage changes are refined too. Refinement
+    stops at intervals narrower than `2 * min_spacing` or after `max_levels`.
+    The other options of `sweep` (warm start, cache, recovery, statistics)
+    apply to every solve.
+    """
+
+    def __init__(self, sweep, axis, tolerances, min_spacing, max_levels=12):
+        self.sweep = sweep
+        self.axis = sweep.grid.axis(axis)
+        self.tolerances = dict(tolerances)
+        self.min_spacing = min_spacing
+        self.max_levels = max_levels
+
+    def others(self):
+        return [axis for axis in self.sweep.grid.axes if axis is not self.axis]
+
+    def row_sweep(self, values, fixed):
+        """Return a copy of the sweep solving `values` of the refined axis, with the other axes `fixed`."""
+        sweep = copy.copy(self.sweep)
+        sweep.grid = Grid(Axis(self.axis.name, values, self.axis.condition),
+                          fixed=self.sweep.grid.fixed + fixed)
+        return sweep
+
+    def flagged(self, values, data, quantities):
+        """Return the indices i of the intervals (values[i], values[i+1]) to refine."""
+        jumps = np.zeros(len(values) - 1, dtype=bool)
+        for quantity, tolerance in self.tolerances.items():
+            column = data[quantities.index(quantity)]
+            change = np.abs(np.diff(column))
+            jumps |= (change > tolerance) | (np.isnan(column[1:]) != np.isnan(column[:-1]))
+        if "assemblage" in quantities:
+            codes = data[quantities.index("assemblage")]
+            both = ~np.isnan(codes[1:]) & ~np.isnan(codes[:-1])
+            jumps |= both & (codes[1:] != codes[:-1])
+        wide = np.diff(values) >= 2 * self.min_spacing
+        return np.nonzero(jumps & wide)[0]
+
+    def run(self, setup=None, processes=1):
+        """Run the adaptive sweep and return an `AdaptiveResult`."""
+        if setup is None and processes == 1:
+            setup = setup_for(self.sweep.definition)
+        quantities = self.sweep.quantities
+        others = self.others()
+
+        rows = {}
+        solves = 0
+        for index in np.ndindex(*[len(axis) for axis in others]):
+            point = tuple(float(axis.values[i]) for axis, i in zip(others, index))
+            fixed = [(axis.condition, axis.values[i]) for axis, i in zip(others, index)]
+
+            values = np.sort(np.asarray(self.axis.values, dtype=float))
+            result = self.row_sweep(values, fixed).run(setup, processes)
+            data, converged = result.data, result.converged
+            solves += len(values)
+
+            for _ in range(self.max_levels):
+                intervals = self.flagged(values, data, quantities)
+                if not len(intervals):
+                    break
+                midpoints = 0.5 * (values[intervals] + values[intervals + 1])
+                result = self.row_sweep(midpoints, fixed).run(setup, processes)
+                solves += len(midpoints)
+
+                values = np.concatenate([values, midpoints])
+                order = np.argsort(values, kind="stable")
+                values = values[order]
+                data = np.concatenate([data, result.data], axis=1)[:, order]
+                converged = np.concatenate([converged, result.converged])[order]
+
+            rows[point] = SweepResult([Axis(self.axis.name, values, self.axis.condition)],
+                                      quantities, data, converged)
+
+        return AdaptiveResult(self.axis.name, rows, solves)
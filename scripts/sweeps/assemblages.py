@@ -0,0 +1,116 @@
+# Phase-assemblage maps: which minerals are present at each point of a grid.
+#
+# Instead of rerunning a script once per commented-out MineralPhases line to
+# see which solids are stable, put all candidate minerals in one
+# SystemDefinition and run `map_assemblages` over the grid. Each point gets the
+# integer code of the `assemblage` extractor (bit i set if the i-th mineral is
+# present, -1 where the solve failed), stored in the smallest integer type
+# that holds all codes. `AssemblageMap.boundaries` traces where neighbouring
+# points have different assemblages, which gives the lines of a stability
+# diagram.
+
+import numpy as np
+
+from .engine import Sweep
+from .extractors import assemblage
+from .grid import Axis
+from .store import ResultStore
+
+FAILED = -1
+
+
+def code_dtype(minerals):
+    """Return the smallest signed integer type holding the codes of `minerals`."""
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        if len(minerals) < np.iinfo(dtype).bits - 1:
+            return np.dtype(dtype)
+    raise ValueError(f"Too many minerals ({len(minerals)}) for an integer-coded assemblage map")
+
+
+class AssemblageMap:
+    """Integer-coded mineral assemblages over the axes of a grid.
+
+    `codes` has the shape of the grid; `minerals` are the names the bits of the
+    codes refer to, in order.
+    """
+
+    def __init__(self, axes, minerals, codes):
+        self.axes = list(axes)
+        self.minerals = list(minerals)
+        self.codes = np.asarray(codes, dtype=code_dtype(self.minerals))
+
+    @classmethod
+    def from_result(cls, result, minerals, quantity="assemblage"):
+        """Build the map from the `assemblage` quantity of a `SweepResult`."""
+        values = result[quantity]
+        codes = np.where(np.isnan(values), FAILED, np.nan_to_num(values)).astype(code_dtype(minerals))
+        return cls(result.axes, minerals, codes)
+
+    @property
+    def names(self):
+        return [axis.name for axis in self.axes]
+
+    def axis(self, name):
+        """Return the values along the axis `name`."""
+        return self.axes[self.names.index(name)].values
+
+    def present(self, code):
+        """Return the names of the minerals present in the assemblage `code`."""
+        return [mineral for i, mineral in enumerate(self.minerals) if int(code) >> i & 1]
+
+    def label(self, code):
+        if code == FAILED:
+            return "not converged"
+        return " + ".join(self.present(code)) or "no minerals"
+
+    def regions(self):
+        """Return `{code: number of points}` for the assemblages on the map, most frequent first."""
+        codes, counts = np.unique(self.codes, return_counts=True)
+        return {int(code): int(count) for count, code in sorted(zip(counts, codes), reverse=True)}
+
+    def boundaries(self):
+        """Return the boundaries between assemblages as `{(code_a, code_b): points}`.
+
+        `points` is an array of shape (n, ndim): the midpoints, in axis values,
+        between neighbouring grid points with codes `code_a < code_b`, sorted
+        along the axes in order. Boundaries with failed points are included
+        with code -1.
+        """
+        values = [np.asarray(axis.values, dtype=float) for axis in self.axes]
+        points = {}
+        for d in range(self.codes.ndim):
+            lower = [slice(None)] * self.codes.ndim
+            upper = [slice(None)] * self.codes.ndim
+            lower[d], upper[d] = slice(None, -1), slice(1, None)
+            a, b = self.codes[tuple(lower)], self.codes[tuple(upper)]
+            for index in zip(*np.nonzero(a != b)):
+                pair = tuple(sorted((int(a[index]), int(b[index]))))
+                point = [v[i] for v, i in zip(values, index)]
+                point[d] = 0.5 * (values[d][index[d]] + values[d][index[d] + 1])
+                points.setdefault(pair, []).append(point)
+        return {pair: np.array(sorted(p)) for pair, p in sorted(points.items())}
+
+    def save(self, path):
+        """Write the map to a new `ResultStore` at `path`."""
+        axes = [(axis.name, axis.values) for axis in self.axes]
+        store = ResultStore.create(path, [(axes[0][0], [])] + axes[1:], ["assemblage"],
+                                   dtypes={"assemblage": self.codes.dtype},
+                                   attributes={"minerals": self.minerals})
+        store.append(axes[0][1], {"assemblage": self.codes})
+        return store
+
+    @classmethod
+    def load(cls, path):
+        store = ResultStore.open(path)
+        axes = [Axis(name, store.axis(name), None) for name in store.names]
+        return cls(axes, store.attributes["minerals"], np.array(store["assemblage"]))
+
+
+def map_assemblages(definition, grid, initial, threshold=1e-8, processes=1, **options):
+    """Solve `definition` over `grid` and return the `AssemblageMap` of its minerals.
+
+    `threshold` is the amount (mol) above which a mineral counts as present;
+    `options` are passed on to `Sweep` (e.g. `warm_start`, `cache`, `recovery`).
+    """
+    sweep = Sweep(definition, grid, [assemblage(threshold)], initial, **options)
+    return AssemblageMap.from_result(sweep.run(processes=processes), definition.minerals.split())
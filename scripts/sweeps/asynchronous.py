@@ -0,0 +1,111 @@
+# An asyncio interface to the sweep engine, for orchestration code that runs
+# in an event loop.
+#
+# A `SweepPool` owns a process pool. Its coroutines and async iterators hand
+# chunks of grid points (or whole server requests) to the pool and await them
+# without blocking the loop, so that many sweeps (temperatures, brines, mineral
+# sets) can be in flight while the loop does I/O and plotting:
+#
+#   async with SweepPool(processes=4) as pool:
+#       results = await asyncio.gather(*(pool.run(sweep) for sweep in sweeps))
+#
+#       async for index, values, converged in pool.points(sweep):
+#           ...   # points arrive chunk by chunk, as they are solved
+#
+# Backpressure: at most `max_chunks` chunks, over all sweeps of the pool, are
+# queued or running in the pool, and `points` only submits more chunks when its
+# consumer asks for the next point, so a slow consumer holds back the solves
+# instead of piling up results. Cancellation: cancelling a task awaiting `run`
+# or `solve`, or closing a `points` iterator (`await points.aclose()`, which
+# also happens when an abandoned one is garbage collected), cancels the chunks
+# of that sweep that have not started; chunks already running finish in their
+# worker and are dropped.
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .engine import SweepResult
+from .parallel import _solve_request, _solve_sweep_chunk, default_chunksize, pool_context, preload
+
+
+class SweepPool:
+    """A process pool running sweeps and equilibrium requests for asyncio code.
+
+    `processes` is the number of worker processes (`None` for one per CPU) and
+    `max_chunks` the number of chunks in the pool at any time (by default four
+    per worker). Use it as an async context manager, or call `close()`.
+    """
+
+    def __init__(self, processes=None, max_chunks=None):
+        self.processes = processes or os.cpu_count()
+        self.max_chunks = max_chunks or 4 * self.processes
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=pool_context())
+        self.slots = asyncio.Semaphore(self.max_chunks)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Shut the pool down, cancelling the chunks that have not started."""
+        shutdown = functools.partial(self.executor.shutdown, wait=True, cancel_futures=True)
+        await asyncio.get_running_loop().run_in_executor(None, shutdown)
+
+    async def submit(self, function, *args):
+        """Run `function(*args)` in the pool once a slot is free and return its asyncio future."""
+        await self.slots.acquire()
+        future = asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    async def points(self, sweep, chunksize=None):
+        """Yield `(index, values, converged)` for every point of `sweep`, in order of completion.
+
+        `values` holds the quantities of `sweep.quantities` at the grid
+        multi-index `index` (NaN where the solver did not converge).
+        """
+        chunks = sweep.chunks(chunksize or default_chunksize(sweep.grid.size, self.processes))
+        # Workers are forked at the first submission and then inherit the loaded database
+        preload([sweep.definition])
+        pending = {}
+        submitted = 0
+        try:
+            while submitted < len(chunks) or pending:
+                # Submit another chunk if a slot is free, or if none of ours is in the pool to wait on
+                if submitted < len(chunks) and (not pending or not self.slots.locked()):
+                    future = await self.submit(_solve_sweep_chunk, sweep, chunks[submitted])
+                    pending[future] = chunks[submitted]
+                    submitted += 1
+                    continue
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    values, succeeded = future.result()
+                    for index, row, ok in zip(pending.pop(future), values, succeeded):
+                        yield index, row, ok
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def run(self, sweep, chunksize=None):
+        """Run `sweep` in the pool and return its `SweepResult`."""
+        data = np.full((len(sweep.quantities),) + sweep.grid.shape, np.nan)
+        converged = np.zeros(sweep.grid.shape, dtype=bool)
+        points = self.points(sweep, chunksize)
+        try:
+            async for index, row, ok in points:
+                data[(slice(None),) + index] = row
+                converged[index] = ok
+        finally:
+            await points.aclose()
+        return SweepResult(sweep.grid.axes, sweep.quantities, data, converged)
+
+    async def solve(self, request):
+        """Solve an `EquilibriumRequest` (see `server.py`) in the pool and return `(values, converged)`."""
+        preload([request.definition])
+        return await (await self.submit(_solve_request, request))
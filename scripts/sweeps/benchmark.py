@@ -0,0 +1,331 @@
+# Benchmarks built from the workloads of the tutorial scripts.
+#
+# Run from the repository root:
+#
+#   PYTHONPATH=scripts python -m sweeps.benchmark --output bench.json
+#   PYTHONPATH=scripts python -m sweeps.benchmark --compare before.json bench.json
+#
+# (or `make benchmark`). Every workload runs in a fresh Python process, so that
+# its startup time (interpreter, imports, database and system) and peak memory
+# are measured on their own. For each workload the JSON report has the number
+# of points, solver calls and failures, points per second, the p50/p99 time
+# per point, the mean number of solver calls per point, the startup time and
+# the peak RSS. The time of a point is that of all the solver calls it took
+# (warm start, initial state and recovery attempts), so it is only the
+# latency of a single `solver.solve` call where `attempts_per_point` is 1.
+#
+# The workloads have fixed sizes taken from the scripts; `--quick` runs a
+# coarser version of the two large sweeps for a fast check.
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import reaktoro
+from reaktoro import ChemicalState
+
+from .engine import Sweep
+from .extractors import carbonate_ratio, pH, species_amount
+from .grid import Axis, Grid, log_fugacity, pressure, temperature
+from .system import InitialState, SystemDefinition
+from .tables import Tabulation
+
+QUICK_STEP = 10  # with --quick, every QUICK_STEP-th value of the stream-model and phrqc2 axes
+
+
+class Timings:
+    """Per-point times, solver calls and failures of a workload."""
+
+    def __init__(self):
+        self.times = []
+        self.attempts = []
+        self.failures = 0
+
+    def solve(self, solver, state, conditions):
+        start = time.perf_counter()
+        res = solver.solve(state, conditions)
+        self.times.append(time.perf_counter() - start)
+        self.attempts.append(1)
+        self.failures += not res.optima.succeeded
+        return res
+
+    def add_result(self, result):
+        """Add the solver statistics of a `SweepResult` run with `stats=True`."""
+        times = result["solver_time"].ravel()
+        solved = ~np.isnan(times)
+        self.times.extend(times[solved])
+        self.attempts.extend(result["solver_attempts"].ravel()[solved])
+        self.failures += int((~result.converged).sum())
+
+
+class Workload:
+    """A fixed-size workload: a system definition and the solves run with it."""
+
+    def definition(self):
+        raise NotImplementedError
+
+    def run(self, setup, quick):
+        """Run the solves with the `EquilibriumSetup` of `definition()` and return their `Timings`."""
+        raise NotImplementedError
+
+
+class StreamModel(Workload):
+    """The 101 x 106 T x ppCO2 grid of ex-geobiology-stream-model.py."""
+
+    def definition(self):
+        return SystemDefinition('databases/phreeqc-extended.dat', "H O C Na Cl Ca P",
+                                minerals="Fluorapatite Hydroxylapatite Calcite")
+
+    def run(self, setup, quick):
+        step = QUICK_STEP if quick else 1
+        grid = Grid(Axis("T", np.flip(np.linspace(0, 50.0, num=101))[::step], temperature("celsius")),
+                    Axis("ppCO2", np.linspace(-4.1, 0.1, num=106)[::step], log_fugacity("CO2", "bar")),
+                    fixed=[(pressure("atm"), 1.0)])
+        initial = InitialState({"H2O": (1.0, "kg"), "Calcite": (10.0, "mol"),
+                                "Fluorapatite": (10.0, "mol"), "Hydroxylapatite": (10.0, "mol")})
+        timings = Timings()
+        sweep = Sweep(setup.definition, grid, [pH(), species_amount("HPO4-2", name="mPO4")], initial,
+                      warm_start=True, stats=True)
+        timings.add_result(sweep.run(setup))
+        return timings
+
+
+class StreamModelTabulated(StreamModel):
+    """The stream-model grid with the G0 of the species tabulated over 0-50 °C (see `tables.py`).
+
+    The G0 are set per point on one system, so the gain over `stream-model`
+    does not depend on the order of the grid axes.
+    """
+
+    def definition(self):
+        definition = super().definition()
+        definition.tabulate = Tabulation(temperatures=(273.15, 323.15))
+        return definition
+
+
+class Phrqc2Fugacity(Workload):
+    """The 3 x 71 T x ppCO2 sweep of the phrqc2 scripts, from Nahcolite, Trona and Natron."""
+
+    def definition(self):
+        return SystemDefinition('databases/phreeqc-toner-catling.dat', "H O C Na Cl",
+                                minerals="Natron Nahcolite Trona Na2CO3:H2O Na2CO3:7H2O",
+                                epsilon=1e-13)
+
+    def run(self, setup, quick):
+        step = QUICK_STEP if quick else 1
+        grid = Grid(Axis("T", [0, 25, 50], temperature("celsius")),
+                    Axis("ppCO2", np.flip(np.linspace(-5.0, 2.0, num=71))[::step], log_fugacity("CO2", "atm")),
+                    fixed=[(pressure("atm"), 1.0)])
+        timings = Timings()
+        for mineral in ("Nahcolite", "Trona", "Natron"):
+            initial = InitialState({"H2O": (1.0, "kg"), mineral: (10.0, "mol"), "CO2": (100.0, "mol")})
+            sweep = Sweep(setup.definition, grid, [pH(), carbonate_ratio()], initial, stats=True)
+            timings.add_result(sweep.run(setup))
+        return timings
+
+
+class SeawaterPitzer(Workload):
+    """Seawater with calcite and dolomite, Pitzer model, 25-90 °C (ex-equilibrium-carbonates-solubility-seawater.py)."""
+
+    # mg per kg of water
+    seawater = {"Ca+2": 412.3, "Mg+2": 1290, "Na+": 10768.0, "K+": 399.1, "Cl-": 19353.0,
+                "HCO3-": 141.682, "SO4-2": 2712.0}
+
+    def definition(self):
+        return SystemDefinition("pitzer.dat", "H O C Ca Cl Na K Mg S Si", minerals="Calcite Dolomite",
+                                activity_models=("PitzerHMW",), specs=("temperature", "pressure"))
+
+    def run(self, setup, quick):
+        timings = Timings()
+        for T in np.arange(25.0, 91.0, 5.0):
+            setup.conditions.temperature(T, "celsius")
+            setup.conditions.pressure(1.0, "atm")
+            state = ChemicalState(setup.system)
+            state.setTemperature(T, "celsius")
+            state.setPressure(1.0, "atm")
+            state.setSpeciesMass("H2O", 1.0, "kg")
+            for species, mass in self.seawater.items():
+                state.setSpeciesMass(species, mass, "mg")
+            timings.solve(setup.solver, state, setup.conditions)
+            state.setSpeciesAmount("Dolomite", 10.0, "mol")
+            state.setSpeciesAmount("Calcite", 10.0, "mol")
+            timings.solve(setup.solver, state, setup.conditions)
+        return timings
+
+
+class CO2NaCl(Workload):
+    """CO2 solubility in 1, 2 and 4 molal NaCl at 100 bar, 25-85 °C (ex-equilibrium-co2-solubility-nacl-h2o.py)."""
+
+    def definition(self):
+        return SystemDefinition("phreeqc.dat", "H O C Na Cl", gases="CO2(g)",
+                                specs=("temperature", "pressure"))
+
+    def run(self, setup, quick):
+        timings = Timings()
+        for mNaCl in (1.0, 2.0, 4.0):
+            for T in np.arange(25.0, 90.0, 5.0):
+                setup.conditions.temperature(T, "celsius")
+                setup.conditions.pressure(100.0, "bar")
+                state = ChemicalState(setup.system)
+                state.setTemperature(T, "celsius")
+                state.setPressure(100.0, "bar")
+                state.setSpeciesMass("H2O", 1.0, "kg")
+                state.setSpeciesAmount("CO2(g)", 10.0, "mol")
+                state.setSpeciesAmount("Na+", mNaCl, "mol")
+                state.setSpeciesAmount("Cl-", mNaCl, "mol")
+                timings.solve(setup.solver, state, setup.conditions)
+        return timings
+
+
+class Titration(Workload):
+    """50 additions of 0.1 mmol HCl, then of NH3, to pure water (ex-ph-dependence-on-contaminants-in-water.py)."""
+
+    def definition(self):
+        return SystemDefinition("supcrt98", "H O Na Cl N", activity_models=("HKF",),
+                                specs=("temperature", "pressure"))
+
+    def run(self, setup, quick):
+        timings = Timings()
+        setup.conditions.temperature(25.0, "celsius")
+        setup.conditions.pressure(1.0, "bar")
+        for titrant in ("HCl(aq)", "NH3(aq)"):
+            state = ChemicalState(setup.system)
+            state.setTemperature(25.0, "celsius")
+            state.setPressure(1.0, "bar")
+            state.setSpeciesMass("H2O(aq)", 1.0, "kg")
+            timings.solve(setup.solver, state, setup.conditions)
+            for _ in range(50):
+                state.add(titrant, 0.1, "mmol")
+                timings.solve(setup.solver, state, setup.conditions)
+        return timings
+
+
+WORKLOADS = {
+    "stream-model": StreamModel(),
+    "stream-model-tabulated": StreamModelTabulated(),
+    "phrqc2-fugacity": Phrqc2Fugacity(),
+    "seawater-pitzer": SeawaterPitzer(),
+    "co2-nacl": CO2NaCl(),
+    "titration": Titration(),
+}
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in MiB."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024**2 if sys.platform == "darwin" else maxrss / 1024  # bytes on macOS, KiB on Linux
+
+
+def run_workload(name, quick=False, launched=None):
+    """Run one workload in this process and return its measurements.
+
+    `launched` is the `time.time()` at which the parent started this process,
+    so that interpreter startup and imports count towards the startup time.
+    """
+    start = time.time()
+    import_time = start - launched if launched is not None else 0.0
+    workload = WORKLOADS[name]
+    setup = workload.definition().build()
+    setup_time = time.time() - start
+
+    start = time.perf_counter()
+    timings = workload.run(setup, quick)
+    elapsed = time.perf_counter() - start
+
+    times = np.array(timings.times)
+    return {
+        "points": len(times),
+        "solves": int(np.sum(timings.attempts)),
+        "failures": timings.failures,
+        "elapsed": elapsed,
+        "points_per_second": len(times) / elapsed if elapsed else None,
+        "point_time_p50": float(np.percentile(times, 50)) if len(times) else None,
+        "point_time_p99": float(np.percentile(times, 99)) if len(times) else None,
+        "attempts_per_point": float(np.mean(timings.attempts)) if len(times) else None,
+        "import_time": import_time,
+        "setup_time": setup_time,
+        "startup_time": import_time + setup_time,
+        "peak_rss_mb": peak_rss(),
+    }
+
+
+def run(names=None, quick=False):
+    """Run the workloads `names` (all by default), each in a new process, and return the report."""
+    report = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "reaktoro": getattr(reaktoro, "__version__", None),
+        "quick": quick,
+        "workloads": {},
+    }
+    for name in names or WORKLOADS:
+        command = [sys.executable, "-m", "sweeps.benchmark", "--workload", name, "--launched", repr(time.time())]
+        if quick:
+            command.append("--quick")
+        output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+        report["workloads"][name] = json.loads(output.splitlines()[-1])
+        print(f"{name}: {report['workloads'][name]['points_per_second']:.1f} points/s", file=sys.stderr)
+    return report
+
+
+def compare(before, after):
+    """Print the change of throughput, time per point, startup and memory between two reports."""
+    print(f"{'workload':<24} {'points/s':>20} {'p50/point [ms]':>20} {'p99/point [ms]':>20} "
+          f"{'solves/point':>16} {'startup [s]':>16} {'RSS [MiB]':>16}")
+    for name in after["workloads"]:
+        if name not in before["workloads"]:
+            continue
+        old, new = before["workloads"][name], after["workloads"][name]
+        columns = []
+        for key, scale, width in (("points_per_second", 1, 20), ("point_time_p50", 1e3, 20),
+                                  ("point_time_p99", 1e3, 20), ("attempts_per_point", 1, 16),
+                                  ("startup_time", 1, 16), ("peak_rss_mb", 1, 16)):
+            if old.get(key) and new.get(key) is not None:
+                text = f"{scale * old[key]:.3g} -> {scale * new[key]:.3g} ({100 * (new[key] / old[key] - 1):+.0f}%)"
+            else:
+                text = "-"
+            columns.append(f"{text:>{width}}")
+        print(f"{name:<24} " + " ".join(columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tutorial workloads")
+    parser.add_argument("names", nargs="*", help=f"workloads to run (default: all of {', '.join(WORKLOADS)})")
+    parser.add_argument("--output", help="write the JSON report to this file instead of standard output")
+    parser.add_argument("--quick", action="store_true", help="run coarser versions of the large sweeps")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two JSON reports")
+    parser.add_argument("--workload", help=argparse.SUPPRESS)
+    parser.add_argument("--launched", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path) as file:
+                reports.append(json.load(file))
+        compare(*reports)
+        return
+
+    if args.workload:
+        print(json.dumps(run_workload(args.workload, args.quick, args.launched)))
+        return
+
+    unknown = [name for name in args.names if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workloads {unknown}; choose from {list(WORKLOADS)}")
+    report = json.dumps(run(args.names, args.quick), indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
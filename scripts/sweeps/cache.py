@@ -0,0 +1,116 @@
+# Persistent on-disk cache of equilibrium results.
+#
+# Entries are content-addressed: the key is a hash of the database file contents,
+# the system definition (phases, activity models, specs, options), the initial
+# state and the conditions of the point. Each entry stores the equilibrium species
+# amounts, temperature and pressure, plus the extracted quantities (keyed by
+# `Extractor.key()`, so a changed extractor is recomputed), in a single
+# SQLite file whose size is bounded by evicting the least recently used entries.
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+# Database file hashes, keyed by (path, mtime, size), so each file is read once per process.
+_database_hashes = {}
+
+
+def database_hash(database):
+    """Return the SHA-256 of a database file, or the name itself for built-in databases."""
+    if not os.path.isfile(database):
+        return database
+    stat = os.stat(database)
+    key = (os.path.abspath(database), stat.st_mtime_ns, stat.st_size)
+    if key not in _database_hashes:
+        with open(database, "rb") as file:
+            _database_hashes[key] = hashlib.sha256(file.read()).hexdigest()
+    return _database_hashes[key]
+
+
+class CacheEntry:
+    """A cached equilibrium: species amounts (mol), T (K), P (Pa) and extracted values."""
+
+    def __init__(self, amounts, temperature, pressure, values):
+        self.amounts = amounts
+        self.temperature = temperature
+        self.pressure = pressure
+        self.values = values
+
+
+class ResultCache:
+    """Size-bounded SQLite cache of converged equilibrium states.
+
+    `max_bytes` bounds the total size of the stored entries; once exceeded, the
+    least recently used entries are evicted. The cache can be shared by the
+    workers of a parallel sweep, each of which opens its own connection.
+    """
+
+    def __init__(self, path, max_bytes=256 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes, "_connection": None, "_pid": None}
+
+    @property
+    def connection(self):
+        # SQLite connections must not be shared with forked pool workers
+        if self._connection is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._connection = sqlite3.connect(self.path, timeout=60.0)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, amounts BLOB, temperature REAL, pressure REAL, "
+                "vals TEXT, size INTEGER, accessed REAL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS accessed ON entries (accessed)")
+        return self._connection
+
+    def key(self, definition, initial, conditions):
+        """Return the key of the point with `conditions`, a list of (Condition, value) pairs."""
+        # The database enters the key through its contents, not its path (first item of the key)
+        description = (database_hash(definition.database), definition.key()[1:], initial.key(),
+                       sorted((condition.key(), float(value)) for condition, value in conditions))
+        return hashlib.sha256(repr(description).encode()).hexdigest()
+
+    def get(self, key):
+        """Return the `CacheEntry` stored under `key`, or None."""
+        with self.connection as db:
+            row = db.execute("SELECT amounts, temperature, pressure, vals FROM entries WHERE key = ?",
+                             (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        amounts, temperature, pressure, values = row
+        return CacheEntry(np.frombuffer(amounts, dtype=float), temperature, pressure, json.loads(values))
+
+    def put(self, key, entry):
+        amounts = np.asarray(entry.amounts, dtype=float).tobytes()
+        values = json.dumps(entry.values)
+        size = len(key) + len(amounts) + len(values)
+        with self.connection as db:
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (key, amounts, entry.temperature, entry.pressure, values, size, time.time()))
+            self._evict(db)
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self.connection as db:
+            db.execute("DELETE FROM entries")
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
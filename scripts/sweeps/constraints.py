@@ -0,0 +1,117 @@
+# Declarative equilibrium constraints, lowered to EquilibriumSpecs methods.
+#
+# ex-expert-equilibrium-custom-constraints.py fixed volume and internal energy
+# with Python lambdas in ConstraintEquation.fn, and the unknown standard
+# chemical potential example updated AqueousProps inside its constraint, so
+# every Newton iteration called back into Python. A `Constraint` names the
+# quantity instead:
+#
+#   V = constraints.volume("m3")
+#   constraints.add(specs, [V, constraints.internal_energy("J")])
+#   conditions = EquilibriumConditions(specs)
+#   V.set(conditions, Vx)
+#
+# Volume, internal energy, enthalpy, pH and phase amounts become the native
+# EquilibriumSpecs constraints of Reaktoro, evaluated without Python. Reaktoro
+# has no native element-molality constraint, so `element_molality` still adds
+# a Python ConstraintEquation, but with the species indices, formula-matrix
+# coefficients and molar mass of water resolved once, it only reads a few
+# species amounts by index instead of updating AqueousProps on every iteration.
+#
+# The `spec` strings of constraints can also go into `SystemDefinition(specs=...)`,
+# and their `condition` into a Grid axis or its fixed conditions.
+
+from reaktoro import ConstraintEquation
+
+from .extractors import SystemIndex
+from .grid import Condition
+
+
+class Constraint:
+    """A quantity fixed at equilibrium.
+
+    `spec` is the entry of `SystemDefinition.specs` that adds the constraint
+    (e.g. `"phaseAmount GaseousPhase"`) and `condition` the `Condition` that
+    sets its value in EquilibriumConditions.
+    """
+
+    def __init__(self, spec, condition):
+        self.spec = spec
+        self.condition = condition
+
+    def __repr__(self):
+        return f"Constraint({self.spec!r})"
+
+    def set(self, conditions, value):
+        """Set the value of the constraint in `conditions`."""
+        self.condition.apply(conditions, value)
+
+
+def volume(unit="m3"):
+    return Constraint("volume", Condition("volume", unit))
+
+
+def internal_energy(unit="J"):
+    return Constraint("internalEnergy", Condition("internalEnergy", unit))
+
+
+def enthalpy(unit="J"):
+    return Constraint("enthalpy", Condition("enthalpy", unit))
+
+
+def pH():
+    return Constraint("pH", Condition("pH", None))
+
+
+def phase_amount(phase, unit="mol"):
+    return Constraint(f"phaseAmount {phase}", Condition("phaseAmount", unit, species=phase))
+
+
+def element_molality(element, phase="AqueousPhase"):
+    """The molality (mol/kgw) of `element` in the aqueous `phase`."""
+    return Constraint(f"elementMolality {element} {phase}", Condition("input", None, species=f"molality[{element}]"))
+
+
+def add_element_molality(specs, element, phase="AqueousPhase", profiler=None):
+    """Constrain the molality of `element` to the input `molality[element]`.
+
+    The species of `phase` containing `element`, their coefficients in the
+    formula matrix and the molar mass of water are resolved once here, so the
+    function called at every iteration only reads species amounts by index.
+    """
+    name = f"molality[{element}]"
+    index = specs.addInput(name)
+    lookup = SystemIndex(specs.system())
+    water, water_molar_mass = lookup.water, lookup.water_molar_mass
+    row = lookup.formula[lookup.elements[element]]
+    terms = [(i, float(row[i])) for i in lookup.phases[phase] if row[i] != 0.0]
+
+    def molality(props, w):
+        amount = sum(coefficient * props.speciesAmount(i) for i, coefficient in terms)
+        return amount / (props.speciesAmount(water) * water_molar_mass) - w[index]
+
+    constraint = ConstraintEquation()
+    constraint.id = name
+    constraint.fn = molality
+    if profiler is not None:
+        profiler.wrap(constraint)
+    specs.addConstraint(constraint)
+
+
+# Specs added by functions of this module rather than by an EquilibriumSpecs method.
+CUSTOM_SPECS = {"elementMolality": add_element_molality}
+
+
+def add(specs, constraints, profiler=None):
+    """Add `constraints` (`Constraint`s or spec strings such as `"fugacity CO2"`) to `specs`.
+
+    Constraints with a Python function are profiled by `profiler`, a
+    `ConstraintProfiler`, if given.
+    """
+    for constraint in constraints:
+        description = constraint.spec if isinstance(constraint, Constraint) else constraint
+        name, *args = description.split()
+        if name in CUSTOM_SPECS:
+            CUSTOM_SPECS[name](specs, *args, profiler=profiler)
+        else:
+            getattr(specs, name)(*args)
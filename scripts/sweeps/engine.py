@@ -0,0 +1,315 @@
+# Parametric equilibrium sweeps over a grid of conditions.
+
+import logging
+import os
+import time
+import warnings
+
+import numpy as np
+from reaktoro import ChemicalState
+
+from .cache import CacheEntry
+from .extractors import Batch, extract
+from .parallel import default_chunksize, map_chunks
+from .registry import setup_for
+from .stats import STATISTICS, PointStats
+
+logger = logging.getLogger(__name__)
+
+
+class SweepResult:
+    """Quantities computed over a grid, stored as one labelled N-D array.
+
+    `data` has shape `(len(quantities), *grid.shape)`, so for the stream model
+    `result["pH"]` is a (num_temperatures, num_co2s) array like `data[0]` used
+    to be. Points where the solver did not converge hold NaN and are False in
+    `converged`.
+    """
+
+    def __init__(self, axes, quantities, data, converged):
+        self.axes = list(axes)
+        self.quantities = list(quantities)
+        self.data = data
+        self.converged = converged
+
+    @property
+    def names(self):
+        return [axis.name for axis in self.axes]
+
+    @property
+    def shape(self):
+        return self.data.shape[1:]
+
+    def __getitem__(self, quantity):
+        return self.data[self.quantities.index(quantity)]
+
+    def axis(self, name):
+        """Return the values along the axis `name`."""
+        return self.axes[self.names.index(name)].values
+
+    def index(self, name, value):
+        """Return the index of the grid value along axis `name` closest to `value`."""
+        return int(np.argmin(np.abs(self.axis(name) - value)))
+
+
+class Sweep:
+    """Solve the equilibrium problem of `definition` at every point of `grid`.
+
+    Each point starts from a fresh copy of `initial` (an `InitialState`), and
+    every extractor in `extractors` contributes one quantity to the result:
+
+        sweep = Sweep(definition, grid, [pH(), element_amount_in_phase("P")], initial)
+        result = sweep.run()
+        result["pH"]
+
+    With `warm_start=True` the grid is walked in serpentine order and every point
+    starts from the converged state of the previous one (its neighbour on the
+    grid); `initial` is then only used for the first point of each chunk and
+    when a warm start fails.
+
+    With a `ResultCache` as `cache`, points solved by earlier runs are restored
+    from the cache instead of being solved again. Cached states are reused
+    regardless of how they were started, so warm-started sweeps read back the
+    state their first run converged to.
+
+    With a `Recovery` as `recovery`, points that fail from their usual starting
+    state are retried from their nearest converged neighbour, from alternative
+    initial states and with relaxed epsilons, and every attempt is logged.
+
+    With `stats=True` the solver statistics of every point (see `stats.py`) are
+    added to the quantities of the result.
+    """
+
+    def __init__(self, definition, grid, extractors, initial, warm_start=False, cache=None,
+                 recovery=None, stats=False):
+        self.definition = definition
+        self.grid = grid
+        self.extractors = list(extractors)
+        self.initial = initial
+        self.warm_start = warm_start
+        self.cache = cache
+        self.recovery = recovery
+        self.stats = stats
+
+    @property
+    def quantities(self):
+        names = [extractor.name for extractor in self.extractors]
+        return names + STATISTICS if self.stats else names
+
+    def order(self):
+        """Return the grid multi-indices in the order they are solved."""
+        return self.grid.serpentine() if self.warm_start else list(self.grid.indices())
+
+    def chunks(self, chunksize=None):
+        """Split the grid multi-indices, in solve order, into consecutive chunks of `chunksize`."""
+        indices = self.order()
+        chunksize = chunksize or len(indices)
+        return [indices[i:i + chunksize] for i in range(0, len(indices), chunksize)]
+
+    def attempts(self, setup, index, previous=None, neighbours=None):
+        """Yield the `(attempt, detail, state, solver)` starts to try in turn for the point `index`."""
+        if previous is not None:
+            yield "warm", None, setup.warm_state(previous), setup.solver
+        yield "initial", None, self.initial.build(setup.system), setup.solver
+        if self.recovery is not None:
+            yield from self.recovery.attempts(self.grid, setup, self.initial, index, previous, neighbours or {})
+
+    def solve_point(self, setup, index, previous=None, neighbours=None):
+        """Equilibrate the grid point `index` and return `(succeeded, state, entry, stats)`.
+
+        If `previous` (the converged state of a neighbouring point) is given, the
+        solver starts from a copy of it and only falls back to a fresh state built
+        from `initial` if that warm start fails; with `recovery`, the retries of
+        `Recovery.attempts` follow, using the converged states in `neighbours`.
+        `entry` is the `CacheEntry` the state was restored from, or None if it
+        was solved, and `stats` the `PointStats` of the solve (None if restored).
+        With a tabulated definition, `setup.at(...)` first sets the G0 of the
+        species for the conditions of the point.
+        """
+        if self.cache is not None:
+            entry = self.cache.get(self.cache_key(index))
+            if entry is not None:
+                return True, self.restore(setup, entry), entry, None
+
+        setup = setup.at(self.grid.conditions(index))
+        self.grid.apply(setup.conditions, index)
+
+        tried = []
+        stats = PointStats()
+        for attempt, detail, state, solver in self.attempts(setup, index, previous, neighbours):
+            start = time.perf_counter()
+            res = solver.solve(state, setup.conditions)
+            stats.add(res, time.perf_counter() - start, attempt in ("warm", "neighbour"))
+            tried.append((attempt, detail, bool(res.optima.succeeded), int(res.optima.iterations)))
+            if res.optima.succeeded:
+                break
+
+        if self.recovery is not None:
+            self.recovery.record(self.grid, index, tried)
+
+        if not res.optima.succeeded:
+            logger.info("The optimization solver hasn't converged for %s", self.grid.point(index))
+
+        return res.optima.succeeded, state, None, stats
+
+    def cache_key(self, index):
+        return self.cache.key(self.definition, self.initial, self.grid.conditions(index))
+
+    def restore(self, setup, entry):
+        """Rebuild the equilibrium state stored in a cache entry."""
+        state = ChemicalState(setup.system)
+        state.setTemperature(entry.temperature)
+        state.setPressure(entry.pressure)
+        state.setSpeciesAmounts(entry.amounts)
+        return state
+
+    def solve_chunk(self, setup, indices):
+        """Solve the points `indices` with `setup` and return `(values, succeeded)` arrays.
+
+        The converged states are collected in a `Batch` and the vectorized
+        extractors are evaluated once for the whole chunk; other extractors are
+        evaluated point by point.
+        """
+        values, succeeded, _ = self.solve_chunk_from(setup, indices)
+        return values, succeeded
+
+    def solve_chunk_from(self, setup, indices, previous=None):
+        """Like `solve_chunk`, but warm-starting the first point from `previous`.
+
+        Returns `(values, succeeded, last)`, where `last` is the state to warm
+        start the next chunk from: the last converged state with `warm_start`,
+        None otherwise.
+        """
+        values = np.full((len(indices), len(self.quantities)), np.nan)
+        succeeded = np.zeros(len(indices), dtype=bool)
+        batch = Batch(setup, len(indices))
+        names = [extractor.name for extractor in self.extractors]
+        keys = [extractor.key() for extractor in self.extractors]
+        pointwise = [j for j, extractor in enumerate(self.extractors) if not extractor.vectorized]
+        cached = {}
+        solved = []
+        neighbours = {}
+
+        previous = previous if self.warm_start else None
+        for k, index in enumerate(indices):
+            succeeded[k], state, entry, stats = self.solve_point(setup, index, previous, neighbours)
+            if self.stats and stats is not None:
+                values[k, len(names):] = stats.values()
+            if not succeeded[k]:
+                continue
+            if self.warm_start:
+                previous = state
+            if self.recovery is not None and self.recovery.neighbour:
+                neighbours[index] = state
+
+            if entry is not None and all(key in entry.values for key in keys):
+                cached[k] = [entry.values[key] for key in keys]
+                continue
+            if entry is None:
+                solved.append((k, index, state))
+
+            if pointwise or entry is not None:
+                setup.props.update(state)
+                setup.aprops.update(state)
+            batch.add(k, state, setup.props if entry is not None else None)
+            for j in pointwise:
+                values[k, j] = float(self.extractors[j].extract(setup, state))
+
+        vectorized = batch.evaluate(self.extractors)
+        columns = [j for j, extractor in enumerate(self.extractors) if extractor.vectorized]
+        values[:, columns] = vectorized[:, columns]
+        for k, row in cached.items():
+            values[k, :len(names)] = row
+
+        if self.cache is not None:
+            for k, index, state in solved:
+                self.cache.put(self.cache_key(index),
+                               CacheEntry(batch.amounts[k], float(state.temperature()),
+                                          float(state.pressure()), dict(zip(keys, values[k, :len(keys)]))))
+
+        return values, succeeded, previous
+
+    def solve_chunks(self, chunks, setup=None, processes=1, chain=False):
+        """Yield the `(values, succeeded)` results of `chunks`, in order.
+
+        With `processes=1` the chunks are solved in this process, using `setup`
+        if given or the registered setup of the definition (see `registry.py`)
+        otherwise; with `chain` and `warm_start`, each chunk starts from the
+        last converged state of the one before. With more
+        processes (or `None` for one per CPU) they are solved by a process pool in
+        which every worker builds its own system once, and every chunk starts
+        from `initial`.
+        """
+        if processes == 1:
+            if setup is None:
+                setup = setup_for(self.definition)
+            previous = None
+            for chunk in chunks:
+                values, succeeded, last = self.solve_chunk_from(setup, chunk, previous)
+                if chain:
+                    previous = last if last is not None else previous
+                yield values, succeeded
+        else:
+            yield from map_chunks(self, chunks, processes or os.cpu_count())
+
+    def run(self, setup=None, processes=1, chunksize=None):
+        """Run the sweep and return a `SweepResult`.
+
+        See `solve_chunks` for `setup` and `processes`. Chunks are solved
+        independently of each other, so for a fixed `chunksize` the result is the
+        same whatever the number of processes. Points where the solver did not
+        converge are logged one by one and counted in a single warning.
+        """
+        if processes != 1:
+            chunksize = chunksize or default_chunksize(self.grid.size, processes or os.cpu_count())
+        chunks = self.chunks(chunksize)
+
+        data = np.full((len(self.quantities),) + self.grid.shape, np.nan)
+        converged = np.zeros(self.grid.shape, dtype=bool)
+
+        for chunk, (values, succeeded) in zip(chunks, self.solve_chunks(chunks, setup, processes)):
+            for index, row, ok in zip(chunk, values, succeeded):
+                data[(slice(None),) + index] = row
+                converged[index] = ok
+
+        warn_failures(int(converged.size - converged.sum()), converged.size)
+        return SweepResult(self.grid.axes, self.quantities, data, converged)
+
+
+def warn_failures(failed, total):
+    """Warn once about the `failed` of `total` points where the solver did not converge."""
+    if failed:
+        warnings.warn(f"The optimization solver hasn't converged at {failed} of {total} points; "
+                      f"they are NaN in the result (the points are logged by {__name__} at INFO level)",
+                      RuntimeWarning, stacklevel=3)
+
+
+def solve_points(definition, initial, conditions, points, extractors, warm_start=False):
+    """Solve the system of `definition` at every row of `points` and return `(values, converged)` arrays.
+
+    Every row of `points` gives one value per `Condition` of `conditions`, and
+    every point starts from `initial`. With `warm_start`, each point starts from
+    the state of the previous converged point instead, so order the points
+    along a path through the conditions; a failed warm start is retried from
+    `initial`.
+    """
+    setup = setup_for(definition)
+    values = np.full((len(points), len(extractors)), np.nan)
+    converged = np.zeros(len(points), dtype=bool)
+    previous = None
+    for k, row in enumerate(points):
+        row_conditions = list(zip(conditions, row))
+        point = setup.at(row_conditions)
+        for condition, value in row_conditions:
+            condition.apply(point.conditions, value)
+        starts = [point.warm_state(previous)] if previous is not None else []
+        for state in starts + [initial.build(point.system)]:
+            if point.solver.solve(state, point.conditions).optima.succeeded:
+                converged[k] = True
+                break
+        if not converged[k]:
+            continue
+        values[k] = extract(extractors, point, state)
+        if warm_start:
+            previous = state
+    return values, converged
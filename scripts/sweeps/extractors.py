@@ -0,0 +1,219 @@
+# Output quantities extracted from the equilibrated states of a sweep.
+#
+# Instead of calling `props.update(state)`, `aprops.update(state)` and a string
+# lookup such as `state.speciesAmount("CO3-2")` at every point, the sweep engine
+# copies the species amounts and ln activities of each converged state into a
+# `Batch` and the extractors compute their quantity for the whole batch at once
+# with NumPy. Species, element and phase names are resolved to indices once per
+# system (see `SystemIndex`). Extractors are plain objects (no lambdas) so that
+# they can be sent to worker processes.
+
+import numpy as np
+
+LN10 = np.log(10.0)
+
+WATER_NAMES = ("H2O", "H2O(aq)", "H2O(l)")
+
+
+def as_array(values):
+    """Convert a Reaktoro array (of autodiff reals) into a float NumPy array."""
+    return np.asarray(values, dtype=float)
+
+
+class SystemIndex:
+    """Name-to-index lookups of a ChemicalSystem, resolved once.
+
+    `minerals` lists the names of the pure mineral phases of the system (as
+    given to `MineralPhases`), whose species carry the same names.
+    """
+
+    def __init__(self, system, minerals=()):
+        self.species = {s.name(): i for i, s in enumerate(system.species())}
+        self.elements = {e.symbol(): i for i, e in enumerate(system.elements())}
+        self.formula = as_array(system.formulaMatrix())
+        self.phases = {phase.name(): [self.species[s.name()] for s in phase.species()]
+                       for phase in system.phases()}
+        self.water = next(self.species[name] for name in WATER_NAMES if name in self.species)
+        self.water_molar_mass = float(system.species(self.water).molarMass())
+        self.aqueous_phase = next(name for name, indices in self.phases.items() if self.water in indices)
+        self.minerals = list(minerals)
+        self.mineral_species = [self.species[name] for name in self.minerals]
+
+
+class Batch:
+    """Species amounts and ln activities of the converged states of a chunk of points.
+
+    Rows of points that were not added (e.g. failed solves) stay NaN, and so do
+    the quantities computed from them.
+    """
+
+    def __init__(self, setup, size):
+        self.index = setup.index
+        self.amounts = np.full((size, len(self.index.species)), np.nan)
+        self.ln_activities = np.full((size, len(self.index.species)), np.nan)
+
+    def add(self, k, state, props=None):
+        """Store row `k` from `state`, with ln activities from `props` or `state.props()`."""
+        props = props if props is not None else state.props()
+        self.amounts[k] = as_array(state.speciesAmounts())
+        self.ln_activities[k] = as_array(props.speciesActivitiesLn())
+
+    def species_amount(self, species):
+        return self.amounts[:, self.index.species[species]]
+
+    def ln_activity(self, species):
+        return self.ln_activities[:, self.index.species[species]]
+
+    def water_mass(self):
+        """Mass of solvent water in kg."""
+        return self.amounts[:, self.index.water] * self.index.water_molar_mass
+
+    def element_amount_in_phase(self, element, phase):
+        columns = self.index.phases[phase]
+        return self.amounts[:, columns] @ self.index.formula[self.index.elements[element], columns]
+
+    def evaluate(self, extractors):
+        """Return the quantities of the vectorized `extractors` as columns of an array."""
+        values = np.full((len(self.amounts), len(extractors)), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for j, extractor in enumerate(extractors):
+                if extractor.vectorized:
+                    values[:, j] = extractor.evaluate(self)
+        return values
+
+
+class Extractor:
+    """Base class of a named scalar computed from an equilibrated state.
+
+    Subclasses either implement `evaluate(batch)` and set `vectorized = True`,
+    or implement `extract(setup, state)`, which is called point by point after
+    `setup.props` and `setup.aprops` have been updated with the state.
+    """
+
+    name = None
+    vectorized = False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+    def key(self):
+        """Return a string identifying the quantity: the class and all its arguments, not just `name`."""
+        return repr((type(self).__name__, sorted(vars(self).items())))
+
+    def extract(self, setup, state):
+        raise NotImplementedError
+
+    def evaluate(self, batch):
+        raise NotImplementedError
+
+
+def extract(extractors, setup, state):
+    """Return the values of `extractors` for a single equilibrated `state`."""
+    batch = Batch(setup, 1)
+    batch.add(0, state)
+    values = batch.evaluate(extractors)[0]
+    if not all(extractor.vectorized for extractor in extractors):
+        setup.props.update(state)
+        setup.aprops.update(state)
+        for j, extractor in enumerate(extractors):
+            if not extractor.vectorized:
+                values[j] = float(extractor.extract(setup, state))
+    return values
+
+
+class pH(Extractor):
+    """pH = -log10 a(H+), as `aprops.pH()`."""
+
+    vectorized = True
+
+    def __init__(self, name="pH"):
+        self.name = name
+
+    def evaluate(self, batch):
+        return -batch.ln_activity("H+") / LN10
+
+
+class species_amount(Extractor):
+    """Amount of `species` in mol, e.g. `state.speciesAmount("CO3-2")[0]`."""
+
+    vectorized = True
+
+    def __init__(self, species, name=None):
+        self.species = species
+        self.name = name or "n" + species
+
+    def evaluate(self, batch):
+        return batch.species_amount(self.species)
+
+
+class species_molality(Extractor):
+
+    vectorized = True
+
+    def __init__(self, species, name=None):
+        self.species = species
+        self.name = name or "m" + species
+
+    def evaluate(self, batch):
+        return batch.species_amount(self.species) / batch.water_mass()
+
+
+class element_molality(Extractor):
+    """Molality of `element` in the aqueous phase, as `aprops.elementMolality(element)`."""
+
+    vectorized = True
+
+    def __init__(self, element, name=None):
+        self.element = element
+        self.name = name or "molal" + element
+
+    def evaluate(self, batch):
+        return batch.element_amount_in_phase(self.element, batch.index.aqueous_phase) / batch.water_mass()
+
+
+class element_amount_in_phase(Extractor):
+    """Amount of `element` in `phase` in mol, e.g. the `moleP` of the phosphate scripts."""
+
+    vectorized = True
+
+    def __init__(self, element, phase="AqueousPhase", name=None):
+        self.element = element
+        self.phase = phase
+        self.name = name or "mole" + element
+
+    def evaluate(self, batch):
+        return batch.element_amount_in_phase(self.element, self.phase)
+
+
+class carbonate_ratio(Extractor):
+    """The carbonate ratio x = 100 * 2 mCO3 / (mHCO3 + 2 mCO3) of the phrqc2 scripts."""
+
+    vectorized = True
+
+    def __init__(self, name="x"):
+        self.name = name
+
+    def evaluate(self, batch):
+        nCO3 = batch.species_amount("CO3-2")
+        nHCO3 = batch.species_amount("HCO3-")
+        return 100 * 2 * nCO3 / (nHCO3 + 2 * nCO3)
+
+
+class assemblage(Extractor):
+    """Integer code of the minerals present: bit i is set if the i-th mineral of
+    `SystemDefinition.minerals` has more than `threshold` mol.
+
+    For minerals "Natron Nahcolite Trona", 2 means Nahcolite alone and 6
+    Nahcolite with Trona. Failed points are NaN like any other quantity.
+    """
+
+    vectorized = True
+
+    def __init__(self, threshold=1e-8, name="assemblage"):
+        self.threshold = threshold
+        self.name = name
+
+    def evaluate(self, batch):
+        amounts = batch.amounts[:, batch.index.mineral_species]
+        codes = (amounts > self.threshold) @ (2 ** np.arange(amounts.shape[1]))
+        return np.where(np.isnan(amounts).any(axis=1), np.nan, codes)
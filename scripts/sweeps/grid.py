@@ -0,0 +1,185 @@
+# Grids of equilibrium conditions (e.g. temperature x ppCO2) for parametric sweeps.
+
+import itertools
+
+import numpy as np
+
+# Offsets to kelvin and factors to pascal of the units accepted by `Condition.si`.
+TEMPERATURE_UNITS = {"K": 0.0, "kelvin": 0.0, "celsius": 273.15, "degC": 273.15, "C": 273.15}
+PRESSURE_UNITS = {"Pa": 1.0, "kPa": 1e3, "MPa": 1e6, "GPa": 1e9, "bar": 1e5, "atm": 101325.0}
+
+
+class Condition:
+    """How a grid value is applied to EquilibriumConditions.
+
+    Use the helper functions `temperature`, `pressure` and `log_fugacity` below,
+    or the constraints of `constraints.py`, rather than constructing this
+    directly.
+    """
+
+    def __init__(self, quantity, unit, species=None, log10=False):
+        self.quantity = quantity
+        self.unit = unit
+        self.species = species
+        self.log10 = log10
+
+    def key(self):
+        return (self.quantity, self.unit, self.species, self.log10)
+
+    def __repr__(self):
+        return f"Condition{self.key()!r}"
+
+    def apply(self, conditions, value):
+        value = float(value)
+        if self.log10:
+            value = 10 ** value
+        if self.quantity == "temperature":
+            conditions.temperature(value, self.unit)
+        elif self.quantity == "pressure":
+            conditions.pressure(value, self.unit)
+        elif self.quantity == "fugacity":
+            conditions.fugacity(self.species, value, self.unit)
+        elif self.quantity in ("volume", "internalEnergy", "enthalpy"):
+            getattr(conditions, self.quantity)(value, self.unit)
+        elif self.quantity == "pH":
+            conditions.pH(value)
+        elif self.quantity == "phaseAmount":
+            conditions.phaseAmount(self.species, value, self.unit)
+        elif self.quantity == "input":
+            conditions.set(self.species, value)
+        else:
+            raise ValueError(f"Unknown equilibrium condition '{self.quantity}'")
+
+    def si(self, value):
+        """Return a temperature value in K or a pressure value in Pa."""
+        value = float(value)
+        if self.log10:
+            value = 10 ** value
+        if self.quantity == "temperature":
+            return value + TEMPERATURE_UNITS[self.unit]
+        if self.quantity == "pressure":
+            return value * PRESSURE_UNITS[self.unit]
+        raise ValueError(f"No SI value for the equilibrium condition '{self.quantity}'")
+
+
+def temperature(unit="celsius"):
+    return Condition("temperature", unit)
+
+
+def pressure(unit="bar"):
+    return Condition("pressure", unit)
+
+
+def log_fugacity(gas, unit="bar"):
+    """Fugacity of `gas` given as log10 value, e.g. the ppCO2 axes of the geobiology scripts."""
+    return Condition("fugacity", unit, species=gas, log10=True)
+
+
+def temperature_and_pressure(conditions):
+    """Return (T in K, P in Pa) set by a list of (Condition, value) pairs, e.g. `grid.conditions(index)`."""
+    values = {condition.quantity: condition.si(value) for condition, value in conditions
+              if condition.quantity in ("temperature", "pressure")}
+    if len(values) < 2:
+        raise ValueError("Both temperature and pressure must be set at every point of the grid")
+    return values["temperature"], values["pressure"]
+
+
+def axis_values(values):
+    """Return axis values as an array: floats for numbers, strings for tags."""
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        values = values.astype(float)
+    return values
+
+
+class Axis:
+    """A named axis of a grid together with the condition its values set.
+
+    Axes of stored or merged results may hold tags (strings) and no condition.
+    """
+
+    def __init__(self, name, values, condition):
+        self.name = name
+        self.values = axis_values(values)
+        self.condition = condition
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Axis({self.name!r}, {len(self)} values)"
+
+
+class Grid:
+    """A regular N-D grid of equilibrium conditions.
+
+    The axes span the grid in the given order; `fixed` lists (condition, value)
+    pairs that are the same at every point, such as the 1 atm pressure of the
+    geobiology sweeps:
+
+        Grid(Axis("T", [0, 25, 50], temperature()),
+             Axis("ppCO2", np.linspace(-4.0, 0.0, 101), log_fugacity("CO2", "atm")),
+             fixed=[(pressure("atm"), 1.0)])
+    """
+
+    def __init__(self, *axes, fixed=()):
+        names = [axis.name for axis in axes]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Grid axis names must be unique, got {names}")
+        self.axes = list(axes)
+        self.fixed = list(fixed)
+
+    @property
+    def names(self):
+        return [axis.name for axis in self.axes]
+
+    @property
+    def shape(self):
+        return tuple(len(axis) for axis in self.axes)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def axis(self, name):
+        for axis in self.axes:
+            if axis.name == name:
+                return axis
+        raise KeyError(f"Grid has no axis named '{name}'")
+
+    def indices(self):
+        """Iterate over the multi-indices of the grid in C (row-major) order."""
+        return itertools.product(*[range(len(axis)) for axis in self.axes])
+
+    def serpentine(self):
+        """Return the multi-indices of the grid in serpentine (boustrophedon) order.
+
+        Consecutive indices differ by one step along a single axis: the last axis
+        is walked forwards and backwards in turn, and likewise for every other
+        axis inside the ones before it. This is the order used for warm starts.
+        """
+        shape = self.shape
+        order = []
+        for digits in self.indices():
+            index = []
+            for n, d in zip(shape, digits):
+                index.append(n - 1 - d if sum(index) % 2 else d)
+            order.append(tuple(index))
+        return order
+
+    def values(self, index):
+        """Return the condition values at the multi-index `index` as a tuple."""
+        return tuple(float(axis.values[i]) for axis, i in zip(self.axes, index))
+
+    def point(self, index):
+        """Return the condition values at `index` as a dict keyed by axis name."""
+        return dict(zip(self.names, self.values(index)))
+
+    def conditions(self, index):
+        """Return the (condition, value) pairs that define the point at `index`."""
+        return self.fixed + [(axis.condition, axis.values[i]) for axis, i in zip(self.axes, index)]
+
+    def apply(self, conditions, index):
+        """Set the fixed conditions and the conditions at `index` on `conditions`."""
+        for condition, value in self.conditions(index):
+            condition.apply(conditions, value)
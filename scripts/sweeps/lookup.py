@@ -0,0 +1,200 @@
+# Exportable lookup tables of equilibrium quantities, for codes that cannot
+# afford an equilibrium solve per query (e.g. a transport model needing pH and
+# dissolved P as functions of T and ppCO2 in its inner loop).
+#
+# `build_lookup` solves a sweep over its grid and refines the grid where
+# multilinear interpolation is not accurate enough: along every axis, the
+# deviation of each node from the straight line through its two neighbours
+# estimates the curvature, and hence the interpolation error of the cells
+# around it, without extra solves. Cells whose estimate exceeds the tolerance
+# of a quantity get the midpoint of their interval inserted into the axis,
+# and the new slab of points is solved. The grid stays rectilinear (one sorted
+# array of values per axis), so a query only needs a binary search per axis.
+#
+# `LookupTable.save` writes one compressed .npz file with the axes, the values
+# and the error estimates; it can be read with `LookupTable.load` or with
+# plain NumPy, and `LookupTable.interpolate` needs nothing but NumPy.
+
+import copy
+import itertools
+
+import numpy as np
+
+from .grid import Axis, Grid
+from .registry import setup_for
+
+
+class LookupTable:
+    """Quantities on a rectilinear grid with multilinear interpolation.
+
+    `values` holds the values of the axes `names` (each sorted ascending),
+    `data` has shape `(len(quantities), *grid shape)` and `error` the estimated
+    interpolation error of every cell, shape `(len(quantities), *cell shape)`
+    (zero if not given).
+    """
+
+    def __init__(self, names, values, quantities, data, error=None):
+        self.names = list(names)
+        self.values = [np.asarray(v, dtype=float) for v in values]
+        self.quantities = list(quantities)
+        self.data = np.asarray(data, dtype=float)
+        if error is None:
+            error = np.zeros((len(self.quantities),) + tuple(len(v) - 1 for v in self.values))
+        self.error = np.asarray(error, dtype=float)
+
+    @property
+    def shape(self):
+        return tuple(len(v) for v in self.values)
+
+    def cells(self, points):
+        """Return the cell indices and the local coordinates (0..1) of `points` along every axis."""
+        indices, fractions = [], []
+        for d, (name, values) in enumerate(zip(self.names, self.values)):
+            x = points[:, d]
+            if np.any(x < values[0]) or np.any(x > values[-1]):
+                raise ValueError(f"{name} outside of the lookup table range {values[0]}..{values[-1]}")
+            i = np.clip(np.searchsorted(values, x, side="right") - 1, 0, len(values) - 2)
+            indices.append(i)
+            fractions.append((x - values[i]) / (values[i + 1] - values[i]))
+        return indices, fractions
+
+    def interpolate(self, points, quantities=None, errors=False):
+        """Return the quantities at `points`, an array of shape (n, number of axes), as shape (n, q).
+
+        `quantities` selects and orders the quantities (all by default). With
+        `errors=True` the estimated interpolation errors of the cells of the
+        points are returned as well. Points in cells with a failed corner are NaN.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        columns = [self.quantities.index(q) for q in quantities] if quantities is not None else list(range(len(self.quantities)))
+        data = self.data[columns]
+        indices, fractions = self.cells(points)
+
+        values = np.zeros((len(points), len(columns)))
+        for corner in itertools.product((0, 1), repeat=len(self.names)):
+            weight = np.ones(len(points))
+            for c, t in zip(corner, fractions):
+                weight *= t if c else 1.0 - t
+            node = tuple(i + c for i, c in zip(indices, corner))
+            values += weight[:, None] * data[(slice(None),) + node].T
+        if not errors:
+            return values
+        return values, self.error[columns][(slice(None),) + tuple(indices)].T
+
+    def __call__(self, *coordinates, quantity):
+        """Return `quantity` at the points with the given coordinates (scalars or arrays), e.g. `table(T, ppCO2, quantity="pH")`."""
+        arrays = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in coordinates])
+        points = np.stack([a.ravel() for a in arrays], axis=1)
+        return self.interpolate(points, [quantity])[:, 0].reshape(arrays[0].shape)
+
+    def save(self, path, dtype=np.float32):
+        """Write the table to a compressed .npz file, storing values and errors as `dtype`."""
+        np.savez_compressed(path, names=np.array(self.names), quantities=np.array(self.quantities),
+                            data=self.data.astype(dtype), error=self.error.astype(dtype),
+                            **{f"axis{d}": values for d, values in enumerate(self.values)})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as file:
+            names = [str(name) for name in file["names"]]
+            values = [file[f"axis{d}"] for d in range(len(names))]
+            return cls(names, values, [str(q) for q in file["quantities"]], file["data"], file["error"])
+
+
+def nonlinearity(values, data, d):
+    """Return the estimated interpolation error of the cells along axis `d`.
+
+    `data` has shape (q, *grid shape); the result has the same shape with one
+    value fewer along axis `d + 1`: for every interval, the largest estimate
+    from its two end nodes. A node's estimate is its deviation from the line
+    through its neighbours, scaled from the neighbours' spacing to the cell's.
+    """
+    x = values
+    data = np.moveaxis(data, d + 1, -1)
+    h = np.diff(x)
+    error = np.zeros(data.shape[:-1] + (len(h),))
+    if len(x) < 3:
+        return np.moveaxis(error, -1, d + 1)
+    left, middle, right = data[..., :-2], data[..., 1:-1], data[..., 2:]
+    t = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+    deviation = np.abs(middle - (left + t * (right - left)))
+    deviation = np.where(np.isnan(deviation), np.inf, deviation)
+    hl, hr = h[:-1], h[1:]
+    # Node i estimates |f''| * hl * hr / 2; a cell of width h has an error of about |f''| * h**2 / 8
+    error[..., :-1] = np.maximum(error[..., :-1], deviation * hl ** 2 / (4 * hl * hr))
+    error[..., 1:] = np.maximum(error[..., 1:], deviation * hr ** 2 / (4 * hl * hr))
+    return np.moveaxis(error, -1, d + 1)
+
+
+def cell_errors(values, data):
+    """Return the estimated error of every cell: the sum over the axes of their estimates, shape (q, *cell shape)."""
+    total = 0.0
+    for d in range(len(values)):
+        error = nonlinearity(values[d], data, d)
+        # Reduce the other axes from nodes to cells, taking the larger estimate of the two sides
+        for other in range(len(values)):
+            if other != d:
+                axis = other + 1
+                lower = np.take(error, range(error.shape[axis] - 1), axis=axis)
+                upper = np.take(error, range(1, error.shape[axis]), axis=axis)
+                error = np.maximum(lower, upper)
+        total = total + error
+    return total
+
+
+def build_lookup(sweep, tolerances, min_spacing, max_levels=6, setup=None, processes=1):
+    """Solve `sweep` and refine its grid until the interpolation error is within `tolerances`.
+
+        table = build_lookup(sweep, tolerances={"pH": 0.01, "mPO4": 1e-6},
+                             min_spacing={"T": 0.25, "ppCO2": 0.01})
+        table.save(results_folder + '/lookup.npz')
+        table(20.0, -3.0, quantity="pH")
+
+    `tolerances` maps quantities of the sweep to the largest accepted
+    interpolation error; `min_spacing` is the smallest interval (per axis
+    name, or one number for all axes) that is still split. The axis values of
+    the grid of `sweep` are the starting points. Refinement stops after
+    `max_levels` levels; cells that still exceed their tolerance then keep
+    their error estimate in the table. The other options of `sweep` (warm
+    start, cache, recovery) apply to every solve.
+    """
+    if setup is None and processes == 1:
+        setup = setup_for(sweep.definition)
+    axes = sweep.grid.axes
+    spacing = {axis.name: min_spacing[axis.name] if isinstance(min_spacing, dict) else min_spacing
+               for axis in axes}
+    quantities = sweep.quantities
+    watched = [quantities.index(q) for q in tolerances]
+    limits = np.array([tolerances[q] for q in tolerances])
+
+    def solve(values):
+        part = copy.copy(sweep)
+        part.grid = Grid(*[Axis(axis.name, v, axis.condition) for axis, v in zip(axes, values)],
+                         fixed=sweep.grid.fixed)
+        return part.run(setup, processes).data
+
+    values = [np.sort(np.asarray(axis.values, dtype=float)) for axis in axes]
+    data = solve(values)
+
+    for _ in range(max_levels):
+        refined = False
+        for d, axis in enumerate(axes):
+            error = nonlinearity(values[d], data[watched], d)
+            # An interval is split if any of its cells exceeds the tolerance of any watched quantity
+            exceeded = error > limits.reshape((-1,) + (1,) * len(axes))
+            exceeded = np.moveaxis(exceeded, d + 1, -1).reshape(-1, len(values[d]) - 1).any(axis=0)
+            wide = np.diff(values[d]) >= 2 * spacing[axis.name]
+            intervals = np.nonzero(exceeded & wide)[0]
+            if not len(intervals):
+                continue
+            refined = True
+            midpoints = 0.5 * (values[d][intervals] + values[d][intervals + 1])
+            new = solve(values[:d] + [midpoints] + values[d + 1:])
+            values[d] = np.concatenate([values[d], midpoints])
+            order = np.argsort(values[d], kind="stable")
+            values[d] = values[d][order]
+            data = np.take(np.concatenate([data, new], axis=d + 1), order, axis=d + 1)
+        if not refined:
+            break
+
+    return LookupTable([axis.name for axis in axes], values, quantities, data, cell_errors(values, data))
@@ -0,0 +1,87 @@
+# Process-pool execution of sweep chunks.
+#
+# Every worker process gets its own EquilibriumSetup for the (picklable)
+# SystemDefinition once, in the pool initializer, from its registry (a forked
+# worker inherits the setups its parent had already built), and then solves
+# whole chunks of grid points. Reaktoro objects are never pickled. Before a pool
+# forks, the parent loads the databases (or builds the setup) of the sweeps, so
+# the workers inherit them instead of each parsing the database file again.
+#
+# Workers are forked where possible so that the tutorial scripts, which have no
+# `if __name__ == "__main__"` guard, are not re-executed in every worker.
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .registry import setup_for
+from .system import load_database
+
+# Per-process state of a pool worker, set by `_init_worker`.
+_sweep = None
+_setup = None
+
+
+def _init_worker(sweep):
+    global _sweep, _setup
+    _sweep = sweep
+    _setup = setup_for(sweep.definition)
+
+
+def _solve_chunk(indices):
+    return _sweep.solve_chunk(_setup, indices)
+
+
+def _run_sweep(sweep):
+    return sweep.run(setup_for(sweep.definition))
+
+
+def _solve_sweep_chunk(sweep, indices):
+    return sweep.solve_chunk(setup_for(sweep.definition), indices)
+
+
+def _solve_request(request):
+    return request.solve()
+
+
+def default_chunksize(size, processes):
+    """Return a chunk size giving each of `processes` workers about four chunks."""
+    return max(1, -(-size // (4 * processes)))
+
+
+def pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+def preload(definitions, setups=False):
+    """Load the databases of `definitions` in this process, or build their setups with `setups`.
+
+    Only done if workers are forked, since other workers cannot inherit them.
+    """
+    if pool_context().get_start_method() != "fork":
+        return
+    for definition in definitions:
+        if setups:
+            setup_for(definition)
+        else:
+            load_database(definition.database)
+
+
+def map_chunks(sweep, chunks, processes):
+    """Solve `chunks` of `sweep` in a pool of `processes` workers and yield their results in order."""
+    preload([sweep.definition], setups=True)
+    with ProcessPoolExecutor(max_workers=processes, mp_context=pool_context(),
+                             initializer=_init_worker,
+                             initargs=(sweep,)) as pool:
+        yield from pool.map(_solve_chunk, chunks)
+
+
+def map_sweeps(sweeps, processes):
+    """Run whole `sweeps` in a pool of `processes` workers and yield their results in order.
+
+    Each worker takes the setups from its registry, so it builds the system of
+    a definition once and reuses it for every sweep of that definition it runs.
+    """
+    preload([sweep.definition for sweep in sweeps])
+    with ProcessPoolExecutor(max_workers=processes, mp_context=pool_context()) as pool:
+        yield from pool.map(_run_sweep, sweeps)
@@ -0,0 +1,108 @@
+# Profiling of the Python functions of custom equilibrium constraints.
+#
+# A ConstraintEquation whose `fn` is a Python function is called at every
+# iteration of the solver, and one that updates AqueousProps on every call can
+# easily dominate the solve. A `ConstraintProfiler` wraps the `fn` of each
+# constraint registered through it, counts its calls and their time, and
+# times the solves it runs, so that the report puts the constraints next to
+# the solver's own timing:
+#
+#   profiler = ConstraintProfiler()
+#   profiler.add(specs, constraint)        # instead of specs.addConstraint(constraint)
+#   ...
+#   profiler.solve(solver, state, conditions)
+#   profiler.print_report()
+#
+# Constraints added with `constraints.add(specs, [...], profiler=profiler)` are
+# profiled as well; the native constraints of that module have no Python
+# function to profile.
+
+import math
+import time
+
+from .stats import LINEAR_TIMINGS, PROPS_TIMINGS, optima_time
+
+
+class ConstraintTiming:
+    """Calls and cumulative time of the function of one constraint."""
+
+    def __init__(self, id, fn):
+        self.id = id
+        self.fn = fn
+        self.calls = 0
+        self.time = 0.0
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        try:
+            return self.fn(*args)
+        finally:
+            self.time += time.perf_counter() - start
+            self.calls += 1
+
+
+class ConstraintProfiler:
+    """Times the constraint functions registered through it and the solves it runs."""
+
+    def __init__(self):
+        self.timings = []
+        self.solves = 0
+        self.iterations = 0
+        self.solve_time = 0.0
+        self.props_time = 0.0
+        self.linear_time = 0.0
+
+    def wrap(self, constraint):
+        """Replace the `fn` of a ConstraintEquation by a timed wrapper and return the constraint."""
+        timing = ConstraintTiming(constraint.id, constraint.fn)
+        constraint.fn = timing
+        self.timings.append(timing)
+        return constraint
+
+    def add(self, specs, constraint):
+        """Add `constraint` to `specs` with its function profiled."""
+        specs.addConstraint(self.wrap(constraint))
+
+    def solve(self, solver, state, *args):
+        """Run `solver.solve(state, *args)`, record its time and iterations and return its result."""
+        start = time.perf_counter()
+        res = solver.solve(state, *args)
+        self.solve_time += time.perf_counter() - start
+        self.solves += 1
+        self.iterations += int(res.optima.iterations)
+        self.props_time += optima_time(res, PROPS_TIMINGS)
+        self.linear_time += optima_time(res, LINEAR_TIMINGS)
+        return res
+
+    def report(self):
+        """Return a dictionary of the solver totals and, per constraint id, its statistics."""
+        iterations = self.iterations or None
+        return {
+            "solves": self.solves,
+            "iterations": self.iterations,
+            "solve_time": self.solve_time,
+            "props_time": self.props_time,
+            "linear_time": self.linear_time,
+            "constraints": {
+                timing.id: {
+                    "calls": timing.calls,
+                    "time": timing.time,
+                    "fraction_of_solve_time": timing.time / self.solve_time if self.solve_time else None,
+                    "calls_per_iteration": timing.calls / iterations if iterations else None,
+                    "time_per_iteration": timing.time / iterations if iterations else None,
+                } for timing in self.timings
+            },
+        }
+
+    def print_report(self):
+        report = self.report()
+        optima = ""
+        if not (math.isnan(report["props_time"]) or math.isnan(report["linear_time"])):
+            optima = f" (properties {report['props_time']:.4f} s, linear systems {report['linear_time']:.4f} s)"
+        print(f"{report['solves']} solves, {report['iterations']} iterations, {report['solve_time']:.4f} s" + optima)
+        for name, timing in report["constraints"].items():
+            fraction = timing["fraction_of_solve_time"]
+            per_iteration = timing["time_per_iteration"]
+            print(f"  {name}: {timing['calls']} calls, {timing['time']:.4f} s"
+                  + (f" ({100 * fraction:.0f}% of the solve time)" if fraction is not None else "")
+                  + (f", {1e6 * per_iteration:.1f} us per iteration" if per_iteration is not None else ""))
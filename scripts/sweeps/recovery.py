@@ -0,0 +1,107 @@
+# Recovery of grid points whose equilibrium solve fails, with a log of every attempt.
+#
+# The scripts print "The optimization solver hasn't converged" and leave NaN in
+# the results, and their initial mineral amounts were tuned by hand until most
+# points converged (see the Trona/Natron comments of
+# ex-phrqc2-figure3a-different-T-and-P.py). With `Sweep(..., recovery=Recovery(...))`
+# a point that fails from its usual starting state is retried, in order:
+#
+#   1. from the converged state of the nearest solved point of its chunk,
+#   2. from each alternative initial state in `seeds`,
+#   3. from the initial state, with each of the relaxed `epsilons`,
+#
+# until an attempt converges. All attempts of such a point are appended to a
+# `FailureLog`, one JSON object per line.
+
+import json
+import os
+import time
+
+
+class FailureLog:
+    """Append-only JSON Lines log of the solve attempts of points that needed recovery.
+
+    Every record has the grid `point` (condition values by axis name), the grid
+    `index`, the `attempt` ("warm", "initial", "neighbour", "seed" or "epsilon"),
+    its `detail` (the point of the neighbour, the position of the seed in
+    `Recovery.seeds`, or the epsilon), whether it `succeeded`, its `iterations`
+    and a `time` stamp. Records are appended by whichever process solves the
+    point, so a parallel sweep can share one log.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return f"FailureLog({self.path!r})"
+
+    def write(self, records):
+        with open(self.path, "a") as file:
+            file.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def records(self):
+        """Return all records of the log, oldest first."""
+        if not os.path.isfile(self.path):
+            return []
+        with open(self.path) as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def failures(self):
+        """Return the points (as grid indices) for which no attempt of their latest solve converged."""
+        # The attempts of one solve of a point are written together, with the same time stamp
+        latest = {}
+        for record in self.records():
+            index = tuple(record["index"])
+            if index not in latest or latest[index][0] != record["time"]:
+                latest[index] = (record["time"], False)
+            latest[index] = (record["time"], latest[index][1] or record["succeeded"])
+        return [index for index, (_, succeeded) in latest.items() if not succeeded]
+
+    def clear(self):
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+class Recovery:
+    """The retry ladder of a sweep for points that fail to converge.
+
+    For the phrqc2 scripts, which start from 10 mol of Nahcolite:
+
+        Recovery(seeds=[InitialState({"H2O": (1.0, "kg"), "Trona": (10.0, "mol"), "CO2": (100.0, "mol")}),
+                        InitialState({"H2O": (1.0, "kg"), "Natron": (10.0, "mol"), "CO2": (100.0, "mol")})],
+                 epsilons=[1e-12, 1e-10],
+                 log=FailureLog(results_folder + '/failures.jsonl'))
+
+    Set `neighbour=False` to skip the retry from the nearest converged point.
+    """
+
+    def __init__(self, seeds=(), epsilons=(1e-12, 1e-10), neighbour=True, log=None):
+        self.seeds = list(seeds)
+        self.epsilons = list(epsilons)
+        self.neighbour = neighbour
+        self.log = log
+
+    def attempts(self, grid, setup, initial, index, previous, neighbours):
+        """Yield the `(attempt, detail, state, solver)` retries of the point `index`.
+
+        `neighbours` maps the grid indices of the converged points of the chunk
+        to their states; `previous`, already tried as the warm start, is skipped.
+        """
+        if self.neighbour and neighbours:
+            nearest = min(neighbours, key=lambda other: sum(abs(a - b) for a, b in zip(other, index)))
+            if neighbours[nearest] is not previous:
+                yield "neighbour", grid.point(nearest), setup.warm_state(neighbours[nearest]), setup.solver
+        for i, seed in enumerate(self.seeds):
+            yield "seed", i, seed.build(setup.system), setup.solver
+        for epsilon in self.epsilons:
+            yield "epsilon", epsilon, initial.build(setup.system), setup.solver_with(epsilon)
+
+    def record(self, grid, index, attempts):
+        """Log `attempts`, the (attempt, detail, succeeded, iterations) of a point, if the first one failed."""
+        if self.log is None or attempts[0][2]:
+            return
+        now = time.time()
+        point = grid.point(index)
+        self.log.write([{"point": point, "index": list(index), "attempt": attempt, "detail": detail,
+                         "succeeded": succeeded, "iterations": iterations, "time": now}
+                        for attempt, detail, succeeded, iterations in attempts])
@@ -0,0 +1,57 @@
+# A per-process registry of built equilibrium setups, reused across runs.
+#
+# Building the ChemicalSystem, EquilibriumSpecs and EquilibriumSolver of a
+# definition takes far longer than a typical solve. A notebook kernel or a
+# long-running process that re-executes a cell would rebuild them every time;
+# `setup_for(definition)` instead returns the setup built the first time, as
+# long as the definition (phases, activity models, specs, options) and the
+# contents of its database file are unchanged. The least recently used setups
+# are dropped once the registry holds `capacity` of them.
+
+from collections import OrderedDict
+
+from .cache import database_hash
+
+
+class SetupRegistry:
+    """LRU registry of `EquilibriumSetup`s keyed by database hash and system definition."""
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.setups = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, definition):
+        return (database_hash(definition.database),) + definition.key()
+
+    def __len__(self):
+        return len(self.setups)
+
+    def __contains__(self, definition):
+        return self.key(definition) in self.setups
+
+    def get(self, definition):
+        """Return the setup of `definition`, building it if it is not registered."""
+        key = self.key(definition)
+        if key in self.setups:
+            self.hits += 1
+            self.setups.move_to_end(key)
+            return self.setups[key]
+        self.misses += 1
+        setup = self.setups[key] = definition.build()
+        if len(self.setups) > self.capacity:
+            self.setups.popitem(last=False)
+        return setup
+
+    def clear(self):
+        self.setups.clear()
+
+
+# The registry of this process, used by `setup_for`.
+registry = SetupRegistry()
+
+
+def setup_for(definition):
+    """Return the `EquilibriumSetup` of `definition` from the registry of this process."""
+    return registry.get(definition)
@@ -0,0 +1,73 @@
+# Variants of a system solved over one grid and merged into one result.
+#
+# ex-phrqc2-figure3a-different-T-and-P.py used to be rerun once per `tag`
+# (Na2(HPO4)-2H2O, -7H2O, -12H2O), each run building a different
+# ChemicalSystem and writing its own data files, before a last pass reloaded
+# them all for the combined plots. A `Scenario` names one variant: its
+# SystemDefinition (the mineral list) and InitialState (the initial mineral
+# amounts, i.e. the equilibrate_* function it stands for). `run_scenarios`
+# solves all of them over the same grid, concurrently, and stacks the results
+# along a leading "scenario" axis whose values are the scenario names.
+
+import os
+
+import numpy as np
+
+from .engine import Sweep, SweepResult
+from .grid import Axis
+from .parallel import map_sweeps
+
+
+class Scenario:
+    """One named variant: a `SystemDefinition` and the `InitialState` to start from."""
+
+    def __init__(self, name, definition, initial):
+        self.name = name
+        self.definition = definition
+        self.initial = initial
+
+    def __repr__(self):
+        return f"Scenario({self.name!r})"
+
+
+def merge_results(results, names, axis="scenario"):
+    """Stack `SweepResult`s with the same axes and quantities along a new leading axis.
+
+    The values of the new axis `axis` are `names`, one per result.
+    """
+    first = results[0]
+    for name, result in zip(names, results):
+        if result.quantities != first.quantities or result.shape != first.shape:
+            raise ValueError(f"The result of '{name}' has other quantities or another shape "
+                             f"than that of '{names[0]}'")
+    return SweepResult([Axis(axis, names, None)] + first.axes, first.quantities,
+                       np.stack([result.data for result in results], axis=1),
+                       np.stack([result.converged for result in results]))
+
+
+def run_scenarios(scenarios, grid, extractors, processes=None, **options):
+    """Solve every scenario over `grid` and return one `SweepResult` indexed by scenario.
+
+        result = run_scenarios(scenarios, grid, [pH(), element_amount_in_phase("P")])
+        result["pH"]            # shape (len(scenarios), *grid.shape)
+        result.axis("scenario") # the scenario names, in order
+
+    Each scenario is a whole `Sweep` (with `options` such as `warm_start` or
+    `recovery`), run in a pool of `processes` workers (`None` for one per CPU,
+    at most one per scenario). With `processes=1` they run one after another
+    here. Either way the setups come from the registry of the process (see
+    `registry.py`), so scenarios differing only in their initial state share
+    one system.
+    """
+    names = [scenario.name for scenario in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Scenario names must be unique, got {names}")
+    sweeps = [Sweep(scenario.definition, grid, extractors, scenario.initial, **options)
+              for scenario in scenarios]
+
+    if processes == 1:
+        results = [sweep.run() for sweep in sweeps]
+    else:
+        results = list(map_sweeps(sweeps, min(processes or os.cpu_count(), len(sweeps))))
+
+    return merge_results(results, names)
@@ -0,0 +1,235 @@
+# A resident equilibrium server on localhost, for tools that used to shell out
+# to the tutorial scripts and parse their text files.
+#
+# Start it from the repository root (or with `make serve`):
+#
+#   PYTHONPATH=scripts python -m sweeps.server --port 8765
+#
+# and POST batches of points to /solve:
+#
+#   {"system":     {"database": "databases/phreeqc-toner-catling.dat", "elements": "H O C Na Cl",
+#                   "minerals": "Natron Nahcolite Trona", "epsilon": 1e-13},
+#    "initial":    {"H2O": [1.0, "kg"], "Nahcolite": [10.0, "mol"], "CO2": [100.0, "mol"]},
+#    "conditions": ["temperature celsius", "pressure atm", "log_fugacity CO2 atm"],
+#    "points":     [[25, 1, -3.5], [25, 1, -3.0]],
+#    "quantities": ["pH", "species_amount CO3-2", "element_amount_in_phase C AqueousPhase"],
+#    "warm_start": true}
+#
+# The `system` entries are the arguments of SystemDefinition, `conditions` and
+# `quantities` name the grid conditions and extractors of this package with
+# their arguments, and every row of `points` gives one value per condition.
+# The reply is `{"quantities": [...], "values": [[...], ...], "converged": [...],
+# "solve_time": s}`, with null values where the solver did not converge.
+#
+# For large batches, send the points as a .npy array (Content-Type
+# application/x-npy) with the rest of the request as JSON in the X-Request
+# header, and ask for an .npz reply (Accept: application/x-npz) holding the
+# arrays `values`, `converged` and `quantities`; `Client` does both.
+#
+# Systems stay built in the setup registry between requests, so after the
+# first request for a system the latency is that of the solves. Requests are
+# handled one at a time, as the Reaktoro objects are not thread-safe. The
+# server only listens on localhost by default and reads databases by path, so
+# do not expose it to other hosts.
+
+import argparse
+import io
+import json
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+
+from . import extractors as _extractors
+from .engine import solve_points
+from .grid import log_fugacity, pressure, temperature
+from .registry import registry
+from .system import InitialState, SystemDefinition
+
+DEFAULT_PORT = 8765
+
+# The conditions and extractors a request may name, with their arguments.
+CONDITIONS = {"temperature": temperature, "pressure": pressure, "log_fugacity": log_fugacity}
+EXTRACTORS = {name: getattr(_extractors, name) for name in
+              ("pH", "species_amount", "species_molality", "element_molality", "element_amount_in_phase",
+               "carbonate_ratio", "assemblage")}
+
+# The SystemDefinition arguments a request may set.
+SYSTEM_ARGUMENTS = ("database", "elements", "minerals", "gases", "activity_models",
+                    "gas_activity_model", "specs", "epsilon", "solid_solutions")
+
+
+def parse_call(description, functions, kind):
+    """Call the function named by the first word of `description` with the other words as arguments."""
+    name, *args = description.split()
+    if name not in functions:
+        raise ValueError(f"Unknown {kind} '{name}'; choose from {sorted(functions)}")
+    return functions[name](*[number(arg) for arg in args])
+
+
+def number(text):
+    """Return `text` as a float if it is one (e.g. an assemblage threshold), as it is otherwise."""
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class EquilibriumRequest:
+    """A parsed batch of points to solve for one system and initial state."""
+
+    def __init__(self, definition, initial, conditions, points, extractors, warm_start=False):
+        self.definition = definition
+        self.initial = initial
+        self.conditions = conditions
+        self.points = points
+        self.extractors = extractors
+        self.warm_start = warm_start
+
+    @classmethod
+    def from_json(cls, request, points=None):
+        """Parse a request dictionary; `points`, if given, replaces its "points" entry."""
+        unknown = set(request["system"]) - set(SYSTEM_ARGUMENTS)
+        if unknown:
+            raise ValueError(f"Unknown system arguments {sorted(unknown)}")
+        system = {key: tuple(value) if isinstance(value, list) else value
+                  for key, value in request["system"].items()}
+        definition = SystemDefinition(**system)
+        initial = InitialState({name: (float(value), unit) for name, (value, unit) in request["initial"].items()})
+        conditions = [parse_call(condition, CONDITIONS, "condition") for condition in request["conditions"]]
+        points = np.asarray(request["points"] if points is None else points, dtype=float)
+        if points.ndim != 2 or points.shape[1] != len(conditions):
+            raise ValueError(f"The points must be rows of {len(conditions)} values, one per condition")
+        extractors = [parse_call(quantity, EXTRACTORS, "quantity") for quantity in request["quantities"]]
+        return cls(definition, initial, conditions, points, extractors, bool(request.get("warm_start", False)))
+
+    @property
+    def quantities(self):
+        return [extractor.name for extractor in self.extractors]
+
+    def solve(self):
+        """Solve every point and return `(values, converged)` arrays (see `engine.solve_points`)."""
+        return solve_points(self.definition, self.initial, self.conditions, self.points, self.extractors,
+                            self.warm_start)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves POST /solve and GET /status."""
+
+    def do_GET(self):
+        if self.path != "/status":
+            return self.reply_json(404, {"error": f"Unknown path {self.path}"})
+        self.reply_json(200, {"systems": len(registry), "capacity": registry.capacity,
+                              "hits": registry.hits, "misses": registry.misses,
+                              "requests": self.server.requests})
+
+    def do_POST(self):
+        if self.path != "/solve":
+            return self.reply_json(404, {"error": f"Unknown path {self.path}"})
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if self.headers.get("Content-Type") == "application/x-npy":
+                request = EquilibriumRequest.from_json(json.loads(self.headers["X-Request"]),
+                                                       np.load(io.BytesIO(body), allow_pickle=False))
+            else:
+                request = EquilibriumRequest.from_json(json.loads(body))
+        except (KeyError, TypeError, ValueError) as error:
+            return self.reply_json(400, {"error": f"Invalid request: {error!r}"})
+
+        start = time.perf_counter()
+        try:
+            values, converged = request.solve()
+        except Exception as error:
+            return self.reply_json(500, {"error": f"{type(error).__name__}: {error}"})
+        elapsed = time.perf_counter() - start
+        self.server.requests += 1
+
+        if self.headers.get("Accept") == "application/x-npz":
+            data = io.BytesIO()
+            np.savez(data, values=values, converged=converged, quantities=np.array(request.quantities))
+            return self.reply(200, data.getvalue(), "application/x-npz", {"X-Solve-Time": repr(elapsed)})
+        self.reply_json(200, {"quantities": request.quantities,
+                              "values": [[None if np.isnan(v) else float(v) for v in row] for row in values],
+                              "converged": converged.tolist(),
+                              "solve_time": elapsed})
+
+    def reply_json(self, status, content):
+        self.reply(status, json.dumps(content).encode(), "application/json")
+
+    def reply(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class EquilibriumServer(HTTPServer):
+    """An HTTP server handling one equilibrium request at a time."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, quiet=False):
+        super().__init__((host, port), Handler)
+        self.requests = 0
+        self.quiet = quiet
+
+
+class Client:
+    """Sends requests to an `EquilibriumServer`, with the points and results as binary arrays.
+
+        client = Client()
+        values, converged = client.solve(request, points)
+
+    `request` is a request dictionary as above, without "points".
+    """
+
+    def __init__(self, url=f"http://127.0.0.1:{DEFAULT_PORT}", timeout=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def solve(self, request, points):
+        """Return the `(values, converged)` arrays of `points` (one row of condition values each)."""
+        data = io.BytesIO()
+        np.save(data, np.asarray(points, dtype=float), allow_pickle=False)
+        http_request = urllib.request.Request(self.url + "/solve", data=data.getvalue(), headers={
+            "Content-Type": "application/x-npy",
+            "Accept": "application/x-npz",
+            "X-Request": json.dumps(request),
+        })
+        with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+            arrays = np.load(io.BytesIO(response.read()), allow_pickle=False)
+            return arrays["values"], arrays["converged"]
+
+    def status(self):
+        with urllib.request.urlopen(self.url + "/status", timeout=self.timeout) as response:
+            return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve equilibrium calculations on localhost")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--systems", type=int, default=registry.capacity,
+                        help="number of built systems to keep (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    args = parser.parse_args()
+
+    registry.capacity = args.systems
+    server = EquilibriumServer(args.host, args.port, args.quiet)
+    print(f"Serving equilibrium requests on http://{args.host}:{args.port}/solve")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Dense gas solubility tables over temperature x pressure x salinity.
+#
+# ex-equilibrium-co2-solubility-nacl-h2o.py called `solubility_co2` once per
+# temperature and brine, each call building a new ChemicalState and
+# AqueousProps. `solubility_table` fills the whole T x P x salinity table in
+# one pass: the points are walked in serpentine order with the salinity axis
+# outermost and increasing, every point starts from the converged state of its
+# neighbour (with the extra salt added to it when the salinity steps up), and
+# the states are collected in one `Batch` whose extractors compute the table
+# at the end.
+
+import numpy as np
+from reaktoro import ChemicalState
+
+from .engine import SweepResult
+from .extractors import Batch, as_array, element_molality
+from .grid import Axis, Grid, pressure, temperature
+
+
+def solubility_table(setup, temperatures, pressures, salinities, gas="CO2(g)", gas_amount=10.0,
+                     ions=("Na+", "Cl-"), water=1.0, extractors=None,
+                     temperature_unit="celsius", pressure_unit="bar", warm_start=True):
+    """Equilibrate `water` kg of brine with `gas_amount` mol of `gas` at every T, P and salinity.
+
+        table = solubility_table(setup, np.arange(25.0, 90.0, 5.0), [100.0], [1.0, 2.0, 4.0])
+        table["molalC"]   # shape (len(temperatures), len(pressures), len(salinities))
+
+    `setup` must have temperature and pressure as its only specs (e.g. the
+    setup of `SystemDefinition(..., gases="CO2(g)", specs=("temperature", "pressure"))`).
+    A salinity `m` adds `m * water` mol of each of `ions`. The quantities are
+    those of the vectorized `extractors`, by default the molality of carbon
+    in the aqueous phase. Points that fail from their neighbour's state are
+    retried from a fresh brine; points that still fail are NaN.
+    """
+    extractors = extractors if extractors is not None else [element_molality("C")]
+    if not all(extractor.vectorized for extractor in extractors):
+        raise ValueError("A solubility table needs vectorized extractors")
+    salinities = np.asarray(salinities, dtype=float)
+    order = np.argsort(salinities, kind="stable")
+
+    # Walked with the salinity outermost, so that the salt only ever increases between neighbours
+    walk = Grid(Axis("salinity", salinities[order], None),
+                Axis("P", pressures, pressure(pressure_unit)),
+                Axis("T", temperatures, temperature(temperature_unit)))
+    shape = (len(walk.axes[2]), len(walk.axes[1]), len(salinities))
+    batch = Batch(setup, int(np.prod(shape)))
+    converged = np.zeros(shape, dtype=bool)
+    ions = [setup.index.species[ion] for ion in ions]
+    water_name = setup.system.species(setup.index.water).name()
+
+    previous = None
+    for s, p, t in walk.serpentine():
+        salinity = walk.axes[0].values[s]
+        for axis, i in ((walk.axes[1], p), (walk.axes[2], t)):
+            axis.condition.apply(setup.conditions, axis.values[i])
+
+        starts = []
+        if warm_start and previous is not None:
+            state, amounts = ChemicalState(previous[0]), as_array(previous[0].speciesAmounts())
+            amounts[ions] += (salinity - previous[1]) * water
+            state.setSpeciesAmounts(amounts)
+            starts.append(state)
+        state = ChemicalState(setup.system)
+        state.setSpeciesMass(water_name, water, "kg")
+        state.setSpeciesAmount(gas, gas_amount, "mol")
+        for ion in ions:
+            state.setSpeciesAmount(ion, salinity * water, "mol")
+        starts.append(state)
+
+        for state in starts:
+            if setup.solver.solve(state, setup.conditions).optima.succeeded:
+                index = (t, p, order[s])
+                converged[index] = True
+                batch.add(int(np.ravel_multi_index(index, shape)), state)
+                previous = (state, salinity)
+                break
+
+    data = batch.evaluate(extractors).T.reshape((len(extractors),) + shape)
+    axes = [Axis("T", temperatures, temperature(temperature_unit)),
+            Axis("P", pressures, pressure(pressure_unit)),
+            Axis("salinity", salinities, None)]
+    return SweepResult(axes, [extractor.name for extractor in extractors], data, converged)
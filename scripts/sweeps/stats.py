@@ -0,0 +1,132 @@
+# Solver statistics of the points of a sweep.
+#
+# With `Sweep(..., stats=True)` every solved point also records how the solver
+# got there, as extra quantities next to those of the extractors, so they end
+# up in the SweepResult or ResultStore with pH, mCO3, ...:
+#
+#   solver_iterations   iterations of all attempts at the point
+#   solver_time         wall time of all attempts, in s
+#   solver_props_time   time evaluating objective and constraints (the chemical
+#                       properties), in s, as reported by Optima
+#   solver_linear_time  time solving linear systems, in s, as reported by Optima
+#   solver_warm         1 if the converged attempt started from another point's state
+#   solver_attempts     number of attempts (more than 1 after a failed warm start
+#                       or with a Recovery)
+#
+# The two Optima timings are NaN with Reaktoro versions that do not expose
+# them. Points restored from a ResultCache have NaN statistics.
+
+import numpy as np
+
+STATISTICS = ["solver_iterations", "solver_time", "solver_props_time", "solver_linear_time",
+              "solver_warm", "solver_attempts"]
+
+# Optima result fields summed into solver_props_time and solver_linear_time.
+PROPS_TIMINGS = ("time_objective_evals", "time_constraint_evals")
+LINEAR_TIMINGS = ("time_linear_systems",)
+
+
+def optima_time(res, fields):
+    """Return the sum of the timing `fields` of `res.optima`, or NaN if one is missing."""
+    values = [getattr(res.optima, field, None) for field in fields]
+    return float(sum(values)) if None not in values else np.nan
+
+
+class PointStats:
+    """Accumulates the statistics of the attempts at one grid point."""
+
+    def __init__(self):
+        self.iterations = 0
+        self.time = 0.0
+        self.props_time = 0.0
+        self.linear_time = 0.0
+        self.warm = 0
+        self.attempts = 0
+
+    def add(self, res, elapsed, warm):
+        self.iterations += int(res.optima.iterations)
+        self.time += elapsed
+        self.props_time += optima_time(res, PROPS_TIMINGS)
+        self.linear_time += optima_time(res, LINEAR_TIMINGS)
+        self.warm = int(warm)
+        self.attempts += 1
+
+    def values(self):
+        """Return the statistics in the order of `STATISTICS`."""
+        return [self.iterations, self.time, self.props_time, self.linear_time, self.warm, self.attempts]
+
+
+def blocks(n, count):
+    """Split range(n) into at most `count` consecutive blocks of indices."""
+    return [block for block in np.array_split(np.arange(n), min(n, count)) if len(block)]
+
+
+def slowest_regions(result, regions=4, count=5):
+    """Return the `count` blocks of the grid with the largest mean solver time.
+
+    Every axis is split into `regions` blocks; each returned item is
+    `(mean time, {axis name: (first value, last value)})`.
+    """
+    times = np.asarray(result["solver_time"], dtype=float)
+    split = [blocks(n, regions) for n in times.shape]
+    ranked = []
+    for block in np.ndindex(*[len(axis_blocks) for axis_blocks in split]):
+        slices = [axis_blocks[b] for axis_blocks, b in zip(split, block)]
+        values = times[np.ix_(*slices)]
+        if np.all(np.isnan(values)):
+            continue
+        ranges = {name: (result.axis(name)[s[0]], result.axis(name)[s[-1]])
+                  for name, s in zip(result.names, slices)}
+        ranked.append((float(np.nanmean(values)), ranges))
+    ranked.sort(key=lambda item: -item[0])
+    return ranked[:count]
+
+
+def histogram(values, bins=20, width=40):
+    """Return the lines of a text histogram of integer `values`, in at most `bins` bins."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)].astype(int)
+    if not len(values):
+        return []
+    first = values.min()
+    counts = np.bincount(values - first)
+    step = max(1, -(-len(counts) // bins))
+    edges = [(lo, min(lo + step, len(counts))) for lo in range(0, len(counts), step)]
+    peak = max(counts[lo:hi].sum() for lo, hi in edges)
+    lines = []
+    for lo, hi in edges:
+        n = int(counts[lo:hi].sum())
+        label = f"{first + lo}" if hi - lo == 1 else f"{first + lo}-{first + hi - 1}"
+        lines.append(f"{label:>9} | {'#' * int(round(width * n / peak)):<{width}} {n}")
+    return lines
+
+
+def print_solver_summary(result, regions=4, count=5):
+    """Print totals, the slowest regions of the grid and a histogram of iterations.
+
+    `result` is a `SweepResult` or `ResultStore` of a sweep run with `stats=True`.
+    """
+    times = np.asarray(result["solver_time"], dtype=float)
+    iterations = np.asarray(result["solver_iterations"], dtype=float)
+    solved = ~np.isnan(times)
+    total = float(np.nansum(times))
+    print(f"Ran the solver at {int(solved.sum())} points in {total:.3f} s "
+          f"({solved.sum() / total if total else np.nan:.1f} solves/s), "
+          f"{np.nanmean(iterations) if solved.any() else np.nan:.1f} iterations per point")
+    if solved.any():
+        warm = np.asarray(result["solver_warm"], dtype=float)[solved]
+        attempts = np.asarray(result["solver_attempts"], dtype=float)[solved]
+        print(f"Warm-started: {100 * warm.mean():.0f}%, retried: {100 * (attempts > 1).mean():.0f}%")
+        props = float(np.nansum(np.asarray(result["solver_props_time"], dtype=float)))
+        linear = float(np.nansum(np.asarray(result["solver_linear_time"], dtype=float)))
+        if props or linear:
+            print(f"Time in properties: {100 * props / total:.0f}%, in linear algebra: {100 * linear / total:.0f}%")
+
+    print("Slowest regions (mean time per solve):")
+    for mean, ranges in slowest_regions(result, regions, count):
+        where = ", ".join(f"{name} {lo:g}..{hi:g}" for name, (lo, hi) in ranges.items())
+        print(f"  {1e3 * mean:8.3f} ms  {where}")
+
+    print("Iterations per point:")
+    for line in histogram(iterations):
+        print("  " + line)
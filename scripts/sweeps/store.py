@@ -0,0 +1,181 @@
+# Columnar binary store for sweep results, replacing the np.savetxt text dumps.
+#
+# A store is a directory holding one raw little-endian array file per quantity
+# (`pH.bin`, `mCO3.bin`, ...) plus `meta.json` with the named axes, their values
+# and the dtype of each quantity. Every quantity has shape (rows, *shape of the
+# remaining axes) in C order, so rows along the first axis can be appended
+# without rewriting anything, and any quantity can be memory-mapped and sliced
+# without reading the rest of the store.
+
+import json
+import os
+
+import numpy as np
+
+from .engine import SweepResult
+from .grid import Axis, axis_values
+
+META = "meta.json"
+VERSION = 1
+
+
+class ResultStore:
+    """A columnar, appendable store of quantities over named axes.
+
+    Create a store with the axes and quantities of a sweep, e.g. for the
+    phrqc2 scripts with a leading tag axis:
+
+        store = ResultStore.create(results_folder + '/phrqc2.store',
+                                   axes=[("tag", []), ("T", [0, 25, 50]), ("ppCO2", co2ppressures)],
+                                   quantities=["pH", "mCO3", "mHCO3", "x"])
+        store.append(["Na2(HPO4)-2H2O"], {"pH": pH[None], ...})
+
+    and read it back with `ResultStore.open(path)["pH"]`, a read-only memory map
+    of shape (rows, 3, len(co2ppressures)).
+    """
+
+    def __init__(self, path, meta, mode="r"):
+        self.path = path
+        self.meta = meta
+        self.mode = mode
+
+    @classmethod
+    def create(cls, path, axes, quantities, dtypes=None, attributes=None):
+        """Create an empty store; the first of `axes` grows as rows are appended.
+
+        `axes` is a list of (name, values) pairs. The values of the first axis
+        must be empty; they are extended by `append`. `dtypes` maps quantity
+        names to dtypes other than float64 (e.g. `{"converged": bool}`), and
+        `attributes` is a JSON-serializable dict kept with the store.
+        """
+        if len(axes[0][1]):
+            raise ValueError(f"The first axis '{axes[0][0]}' of a new store must be empty")
+        os.makedirs(path, exist_ok=True)
+        dtypes = dtypes or {}
+        meta = {
+            "version": VERSION,
+            "axes": [{"name": name, "values": axis_values(values).tolist()} for name, values in axes],
+            "quantities": {q: np.dtype(dtypes.get(q, float)).newbyteorder("<").str for q in quantities},
+            "rows": 0,
+            "attributes": attributes or {},
+        }
+        for quantity in quantities:
+            open(os.path.join(path, quantity + ".bin"), "wb").close()
+        store = cls(path, meta, mode="r+")
+        store._write_meta()
+        return store
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Open an existing store for reading (`"r"`) or appending (`"r+"`)."""
+        with open(os.path.join(path, META)) as file:
+            meta = json.load(file)
+        if meta["version"] != VERSION:
+            raise ValueError(f"Unsupported result store version {meta['version']} in {path}")
+        return cls(path, meta, mode)
+
+    def _write_meta(self):
+        temporary = os.path.join(self.path, META + ".tmp")
+        with open(temporary, "w") as file:
+            json.dump(self.meta, file)
+        os.replace(temporary, os.path.join(self.path, META))
+
+    @property
+    def names(self):
+        return [axis["name"] for axis in self.meta["axes"]]
+
+    @property
+    def quantities(self):
+        return list(self.meta["quantities"])
+
+    @property
+    def attributes(self):
+        return self.meta.get("attributes", {})
+
+    @property
+    def rows(self):
+        return self.meta["rows"]
+
+    @property
+    def shape(self):
+        """The shape of every quantity: (rows, *shape of the remaining axes)."""
+        return (self.rows,) + tuple(len(axis["values"]) for axis in self.meta["axes"][1:])
+
+    def axis(self, name):
+        """Return the values along the axis `name`."""
+        return axis_values(self.meta["axes"][self.names.index(name)]["values"])
+
+    def dtype(self, quantity):
+        return np.dtype(self.meta["quantities"][quantity])
+
+    def empty(self, quantity, rows):
+        """Return an array of `rows` rows of `quantity` holding no data: NaN for floats, zero otherwise."""
+        dtype = self.dtype(quantity)
+        fill = np.nan if dtype.kind in "fc" else 0
+        return np.full((rows,) + self.shape[1:], fill, dtype=dtype)
+
+    def __getitem__(self, quantity):
+        """Return `quantity` as a read-only memory map (an empty array if there are no rows)."""
+        if self.rows == 0:
+            return self.empty(quantity, 0)
+        return np.memmap(os.path.join(self.path, quantity + ".bin"), dtype=self.dtype(quantity),
+                         mode="r", shape=self.shape)
+
+    def read(self, quantity, rows=None):
+        """Return `quantity` as an array of `rows` rows (all stored rows by default).
+
+        Rows that were never appended (e.g. those of an interrupted streaming
+        sweep) are NaN for float quantities, as points that failed to converge
+        are in a `SweepResult`, and zero (False) for the others.
+        """
+        rows = self.rows if rows is None else rows
+        array = self.empty(quantity, rows)
+        stored = min(rows, self.rows)
+        if stored:
+            array[:stored] = self[quantity][:stored]
+        return array
+
+    def append(self, values, data):
+        """Append rows along the first axis.
+
+        `values` are the first-axis values of the new rows and `data` maps every
+        quantity to an array of shape (len(values), *shape of the remaining axes).
+        The data files are written before the metadata, so an interrupted append
+        leaves the store at its previous number of rows.
+        """
+        if self.mode == "r":
+            raise PermissionError(f"Result store {self.path} is opened read-only")
+        rowshape = self.shape[1:]
+        values = axis_values(values).tolist()
+        for quantity in self.quantities:
+            array = np.asarray(data[quantity], dtype=self.dtype(quantity))
+            if array.shape != (len(values),) + rowshape:
+                raise ValueError(f"Expected {quantity} of shape {(len(values),) + rowshape}, got {array.shape}")
+            with open(os.path.join(self.path, quantity + ".bin"), "r+b") as file:
+                file.seek(self.rows * int(np.prod(rowshape)) * array.itemsize)
+                file.write(np.ascontiguousarray(array).tobytes())
+                file.truncate()
+        self.meta["axes"][0]["values"].extend(values)
+        self.meta["rows"] += len(values)
+        self._write_meta()
+
+
+def save_result(result, path):
+    """Write a `SweepResult` to a new store at `path`, with a `converged` quantity."""
+    axes = [(axis.name, axis.values) for axis in result.axes]
+    store = ResultStore.create(path, [(axes[0][0], [])] + axes[1:],
+                               result.quantities + ["converged"], dtypes={"converged": bool})
+    data = {quantity: result[quantity] for quantity in result.quantities}
+    data["converged"] = result.converged
+    store.append(axes[0][1], data)
+    return store
+
+
+def load_result(path):
+    """Read a store written by `save_result` back into a `SweepResult`."""
+    store = ResultStore.open(path)
+    quantities = [q for q in store.quantities if q != "converged"]
+    axes = [Axis(name, store.axis(name), None) for name in store.names]
+    data = np.array([store[q] for q in quantities])
+    converged = np.array(store["converged"]) if "converged" in store.quantities else ~np.isnan(data[0])
+    return SweepResult(axes, quantities, data, converged)
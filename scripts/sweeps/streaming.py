@@ -0,0 +1,78 @@
+# Streaming sweeps: results are flushed to a ResultStore one grid row at a time.
+#
+# A row is the set of points sharing an index along the first grid axis (e.g. one
+# temperature of a T x ppCO2 grid). Each row is solved as one chunk, appended to
+# the store as soon as it is complete and then dropped, so memory does not grow
+# with the grid. Rerunning the same sweep against the same store resumes after
+# the last flushed row. With `warm_start`, each row starts from the last
+# converged state of the row before, but the first row of a resumed run starts
+# from `initial`, so its results (and those of the rows chained after it) can
+# differ from the ones of an uninterrupted run.
+
+import os
+
+import numpy as np
+
+from .engine import warn_failures
+from .store import ResultStore
+
+
+def rows(sweep):
+    """Split the solve order of `sweep` into one chunk per index of the first axis."""
+    chunks = {}
+    for index in sweep.order():
+        chunks.setdefault(index[0], []).append(index)
+    return [chunks[i] for i in sorted(chunks)]
+
+
+def open_store(sweep, path):
+    """Open the store of `sweep` at `path` for appending, creating it if needed.
+
+    An existing store must have been written by the same sweep: same quantities,
+    same axes, and first-axis values matching the leading values of the grid.
+    """
+    quantities = sweep.quantities + ["converged"]
+    axes = sweep.grid.axes
+
+    if not os.path.exists(path):
+        return ResultStore.create(path, [(axes[0].name, [])] + [(a.name, a.values) for a in axes[1:]],
+                                  quantities, dtypes={"converged": bool})
+
+    store = ResultStore.open(path, mode="r+")
+    compatible = (store.quantities == quantities and store.names == sweep.grid.names
+                  and all(np.array_equal(store.axis(a.name), a.values) for a in axes[1:])
+                  and np.array_equal(store.axis(axes[0].name), axes[0].values[:store.rows]))
+    if not compatible:
+        raise ValueError(f"The result store {path} was written by a different sweep; "
+                         "remove it or choose another path to start over")
+    return store
+
+
+def run_streaming(sweep, path, setup=None, processes=1):
+    """Run `sweep` row by row into the `ResultStore` at `path` and return the store.
+
+    Rows already in the store are skipped. With `warm_start`, each row starts
+    from the last converged state of the row before, which is its neighbour in
+    the serpentine order, as in `Sweep.run`; the first row solved by this call
+    starts from `initial`. With several processes the rows are
+    solved concurrently (each from `initial`) but still flushed in grid order.
+    """
+    store = open_store(sweep, path)
+    chunks = rows(sweep)[store.rows:]
+    first = sweep.grid.axes[0]
+    rowshape = sweep.grid.shape[1:]
+
+    failed = total = 0
+    for chunk, (values, succeeded) in zip(chunks, sweep.solve_chunks(chunks, setup, processes, chain=True)):
+        failed += int(len(succeeded) - succeeded.sum())
+        total += len(succeeded)
+        data = {quantity: np.full((1,) + rowshape, np.nan) for quantity in sweep.quantities}
+        data["converged"] = np.zeros((1,) + rowshape, dtype=bool)
+        for index, row, ok in zip(chunk, values, succeeded):
+            for quantity, value in zip(sweep.quantities, row):
+                data[quantity][(0,) + index[1:]] = value
+            data["converged"][(0,) + index[1:]] = ok
+        store.append([first.values[chunk[0][0]]], data)
+
+    warn_failures(failed, total)
+    return store
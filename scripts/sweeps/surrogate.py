@@ -0,0 +1,315 @@
+# Surrogate models of sweep results, for reactive-transport codes that need the
+# same chemistry at millions of points.
+#
+# `train_surrogate` fits a linear least-squares regression (Legendre
+# polynomials or Gaussian radial basis functions of the scaled axis values) to
+# every quantity of a `SweepResult`. The grid points are split into folds and
+# each fold is predicted by the model fitted to the others; these
+# out-of-fold residuals, kept on the grid, are the uncertainty of the surrogate
+# at the points of the cells around them, so that regions where the fit is poor
+# (a mineral dissolving out, failed points) are known without extra solves.
+#
+# A `SurrogateSolver` answers queries with the surrogate and falls back to a
+# real equilibrium solve of the sweep's system for points outside the trained
+# domain or whose uncertainty exceeds the tolerance of a quantity:
+#
+#   surrogate = train_surrogate(sweep.run(), basis="rbf", log=("P",))
+#   solver = SurrogateSolver(surrogate, sweep, tolerances={"pH": 0.01, "P": 1e-7})
+#   solver.validate(200)                 # held-out Reaktoro solves; calibrates the uncertainty
+#   values, solved = solver.evaluate(points)
+
+import itertools
+
+import numpy as np
+
+from .engine import solve_points
+from .lookup import LookupTable
+
+# Number of points whose features are built at once by `Surrogate.predict`.
+BLOCK = 16384
+
+# Default uncertainty floor of a quantity, relative to its largest magnitude in the training data.
+FLOOR = 1e-6
+
+
+class PolynomialBasis:
+    """Products of Legendre polynomials of the scaled inputs, of total degree up to `degree`."""
+
+    kind = "polynomial"
+
+    def __init__(self, dimension, degree=6):
+        self.dimension = dimension
+        self.degree = degree
+        self.powers = [p for p in itertools.product(range(degree + 1), repeat=dimension) if sum(p) <= degree]
+
+    def parameters(self):
+        return {"degree": self.degree}
+
+    def features(self, x):
+        """Return the features of the points `x`, scaled to [-1, 1], as shape (n, features)."""
+        vanders = [np.polynomial.legendre.legvander(x[:, d], self.degree) for d in range(self.dimension)]
+        features = np.ones((len(x), len(self.powers)))
+        for k, powers in enumerate(self.powers):
+            for d, p in enumerate(powers):
+                if p:
+                    features[:, k] *= vanders[d][:, p]
+        return features
+
+
+class RBFBasis:
+    """Gaussian radial basis functions on `centers` points per axis of the scaled inputs, plus a linear part."""
+
+    kind = "rbf"
+
+    def __init__(self, dimension, centers=12, width=1.5):
+        self.dimension = dimension
+        self.centers = centers
+        self.width = width
+        line = np.linspace(-1.0, 1.0, centers)
+        self.points = np.array(list(itertools.product(line, repeat=dimension)))
+        # `width` is in units of the center spacing
+        self.scale = width * 2.0 / (centers - 1)
+
+    def parameters(self):
+        return {"centers": self.centers, "width": self.width}
+
+    def features(self, x):
+        distances = ((x[:, None, :] - self.points[None, :, :]) ** 2).sum(axis=2)
+        return np.hstack([np.ones((len(x), 1)), x, np.exp(-distances / self.scale ** 2)])
+
+
+BASES = {"polynomial": PolynomialBasis, "rbf": RBFBasis}
+
+
+class Surrogate:
+    """A regression model of quantities over named axes, with a local uncertainty.
+
+    `lower` and `upper` bound the trained domain, `coefficients` has shape
+    (features, quantities), and the quantities named in `log` are fitted as
+    their log10. `residuals` is a `LookupTable` of the out-of-fold errors on
+    the training grid; the uncertainty of a point is the largest of them at the
+    corners of its cell, but at least the `floor` of the quantity, times the
+    calibration `scale` of the quantity.
+    """
+
+    def __init__(self, names, lower, upper, quantities, basis, coefficients, residuals, log=(), scale=None,
+                 floor=None):
+        self.names = list(names)
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.quantities = list(quantities)
+        self.basis = basis
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.residuals = residuals
+        self.log = [q in log for q in self.quantities]
+        self.scale = np.ones(len(self.quantities)) if scale is None else np.asarray(scale, dtype=float)
+        self.floor = np.zeros(len(self.quantities)) if floor is None else np.asarray(floor, dtype=float)
+
+    def scaled(self, points):
+        return 2.0 * (points - self.lower) / (self.upper - self.lower) - 1.0
+
+    def contains(self, points):
+        """Return a boolean mask of the points inside the trained domain."""
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        return np.all((points >= self.lower) & (points <= self.upper), axis=1)
+
+    def fit_values(self, points):
+        """Return the fitted values (log10 for the `log` quantities) at points inside the domain."""
+        return np.vstack([self.basis.features(self.scaled(points[i:i + BLOCK])) @ self.coefficients
+                          for i in range(0, len(points), BLOCK)]) if len(points) else np.zeros((0, len(self.quantities)))
+
+    def uncertainty(self, points):
+        """Return the uncertainty of the quantities at points inside the domain, shape (n, q)."""
+        indices, _ = self.residuals.cells(points)
+        uncertainty = np.zeros((len(points), len(self.quantities)))
+        for corner in itertools.product((0, 1), repeat=len(self.names)):
+            node = tuple(i + c for i, c in zip(indices, corner))
+            uncertainty = np.maximum(uncertainty, self.residuals.data[(slice(None),) + node].T)
+        return np.maximum(uncertainty, self.floor) * self.scale
+
+    def predict(self, points):
+        """Return `(values, uncertainty)` at `points`, an array of shape (n, number of axes).
+
+        Points outside the trained domain are NaN with an infinite uncertainty.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        inside = self.contains(points)
+        values = np.full((len(points), len(self.quantities)), np.nan)
+        uncertainty = np.full(values.shape, np.inf)
+        fitted = self.fit_values(points[inside])
+        values[inside] = np.where(self.log, 10.0 ** fitted, fitted)
+        uncertainty[inside] = self.uncertainty(points[inside])
+        return values, uncertainty
+
+    def save(self, path):
+        """Write the surrogate to a compressed .npz file."""
+        np.savez_compressed(path, names=np.array(self.names), lower=self.lower, upper=self.upper,
+                            quantities=np.array(self.quantities), coefficients=self.coefficients,
+                            log=np.array(self.log), scale=self.scale, floor=self.floor,
+                            basis=np.array(self.basis.kind),
+                            parameters=np.array(list(self.basis.parameters().values()), dtype=float),
+                            residuals=self.residuals.data,
+                            **{f"axis{d}": values for d, values in enumerate(self.residuals.values)})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as file:
+            names = [str(name) for name in file["names"]]
+            quantities = [str(q) for q in file["quantities"]]
+            kind = BASES[str(file["basis"])]
+            parameters = file["parameters"]
+            basis = kind(len(names), int(parameters[0]), *parameters[1:])
+            values = [file[f"axis{d}"] for d in range(len(names))]
+            residuals = LookupTable(names, values, quantities, file["residuals"])
+            log = [q for q, logged in zip(quantities, file["log"]) if logged]
+            return cls(names, file["lower"], file["upper"], quantities, basis, file["coefficients"],
+                       residuals, log, file["scale"], file["floor"])
+
+
+def fit(features, targets):
+    """Return the least-squares coefficients of `targets` (n, q) on `features` (n, f), per quantity."""
+    coefficients = np.zeros((features.shape[1], targets.shape[1]))
+    for k in range(targets.shape[1]):
+        ok = np.isfinite(targets[:, k])
+        coefficients[:, k] = np.linalg.lstsq(features[ok], targets[ok, k], rcond=None)[0]
+    return coefficients
+
+
+def train_surrogate(result, quantities=None, basis="polynomial", log=(), folds=5, seed=0, floor=None, **parameters):
+    """Fit a `Surrogate` to the quantities of the `SweepResult` `result`.
+
+        surrogate = train_surrogate(result, ["pH", "P"], basis="rbf", centers=15, log=("P",))
+
+    `basis` is "polynomial" (with `degree`) or "rbf" (with `centers` per axis
+    and `width` in units of the center spacing). The quantities named in `log`
+    are fitted as their log10, which suits amounts spanning several orders of
+    magnitude. Points that did not converge are left out of the fit and get an
+    infinite uncertainty, as do non-positive values of `log` quantities.
+    `floor` maps quantities to the smallest uncertainty reported for them
+    (by default `FLOOR` times their largest magnitude), so that an exactly
+    fitted quantity never claims to be exact.
+    """
+    quantities = list(quantities) if quantities is not None else list(result.quantities)
+    names = [axis.name for axis in result.axes]
+    values = [np.asarray(axis.values, dtype=float) for axis in result.axes]
+    data = np.array([result[q] for q in quantities], dtype=float)
+    # The residual table needs ascending axes
+    for d, v in enumerate(values):
+        order = np.argsort(v, kind="stable")
+        values[d] = v[order]
+        data = np.take(data, order, axis=d + 1)
+    shape = data.shape[1:]
+    points = np.stack(np.meshgrid(*values, indexing="ij"), axis=-1).reshape(-1, len(values))
+    data = data.reshape(len(quantities), -1).T
+    logged = np.array([q in log for q in quantities])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        targets = np.where(logged, np.log10(np.where(data > 0, data, np.nan)), data)
+
+    lower = np.array([v[0] for v in values])
+    upper = np.array([v[-1] for v in values])
+    basis = BASES[basis](len(values), **parameters)
+    features = basis.features(2.0 * (points - lower) / (upper - lower) - 1.0)
+
+    # Out-of-fold predictions of every point, from the models fitted without its fold
+    fold = np.random.default_rng(seed).integers(folds, size=len(points))
+    predicted = np.zeros_like(targets)
+    for k in range(folds):
+        train = fold != k
+        predicted[~train] = features[~train] @ fit(features[train], targets[train])
+    predicted = np.where(logged, 10.0 ** predicted, predicted)
+    residuals = np.abs(predicted - data)
+    residuals[~np.isfinite(targets)] = np.inf
+    residuals = LookupTable(names, values, quantities, residuals.T.reshape((len(quantities),) + shape))
+
+    with np.errstate(invalid="ignore"):
+        magnitude = np.nan_to_num(np.nanmax(np.abs(data), axis=0, initial=0.0, where=np.isfinite(data)))
+    floor = [floor[q] if floor is not None and q in floor else max(FLOOR * m, np.finfo(float).eps)
+             for q, m in zip(quantities, magnitude)]
+
+    return Surrogate(names, lower, upper, quantities, basis, fit(features, targets), residuals, log, floor=floor)
+
+
+class SurrogateSolver:
+    """Answers queries with `surrogate`, solving the system of `sweep` where it is not trusted.
+
+    A point is solved with Reaktoro if it lies outside the trained domain or if
+    the uncertainty of any quantity exceeds its entry in `tolerances`
+    (quantities without a tolerance are always trusted). The fallback solves use
+    the definition, initial state, extractors and fixed conditions of `sweep`,
+    whose grid axes must be those the surrogate was trained on.
+    """
+
+    def __init__(self, surrogate, sweep, tolerances):
+        if sweep.grid.names != surrogate.names:
+            raise ValueError(f"The surrogate was trained on the axes {surrogate.names}, not {sweep.grid.names}")
+        self.surrogate = surrogate
+        self.sweep = sweep
+        self.tolerances = np.array([tolerances.get(q, np.inf) for q in surrogate.quantities])
+        extractors = {extractor.name: extractor for extractor in sweep.extractors}
+        self.extractors = [extractors[q] for q in surrogate.quantities]
+        self.queries = 0
+        self.fallbacks = 0
+
+    def solve(self, points):
+        """Solve `points` with Reaktoro and return `(values, converged)`."""
+        grid = self.sweep.grid
+        conditions = [condition for condition, _ in grid.fixed] + [axis.condition for axis in grid.axes]
+        fixed = np.array([value for _, value in grid.fixed], dtype=float)
+        rows = np.hstack([np.broadcast_to(fixed, (len(points), len(fixed))), points])
+        return solve_points(self.sweep.definition, self.sweep.initial, conditions, rows, self.extractors)
+
+    def evaluate(self, points):
+        """Return `(values, solved)`: the quantities at `points` and a mask of the points solved with Reaktoro.
+
+        Solved points where the solver does not converge are NaN.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        values, uncertainty = self.surrogate.predict(points)
+        solved = np.any(uncertainty > self.tolerances, axis=1)
+        if np.any(solved):
+            values[solved] = self.solve(points[solved])[0]
+        self.queries += len(points)
+        self.fallbacks += int(solved.sum())
+        return values, solved
+
+    def validate(self, points=200, coverage=0.95, seed=0):
+        """Compare the surrogate with Reaktoro solves of held-out points and calibrate its uncertainty.
+
+        `points` is an array of points or the number of random points to draw
+        in the trained domain. The uncertainty of every quantity is scaled up
+        (never down) so that at least the fraction `coverage` of the errors lie
+        within it; if that takes an infinite scale, the surrogate is never
+        trusted for the quantity. Returns a dictionary with, per quantity, the largest and the
+        root-mean-square error, the coverage before calibration and the scale.
+        """
+        if np.isscalar(points):
+            rng = np.random.default_rng(seed)
+            points = rng.uniform(self.surrogate.lower, self.surrogate.upper, size=(int(points), len(self.surrogate.names)))
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        points = points[self.surrogate.contains(points)]
+
+        self.surrogate.scale = np.ones(len(self.surrogate.quantities))
+        predicted, uncertainty = self.surrogate.predict(points)
+        solved, converged = self.solve(points)
+        errors = np.abs(predicted - solved)[converged]
+        uncertainty = uncertainty[converged]
+
+        report = {}
+        for k, quantity in enumerate(self.surrogate.quantities):
+            error, bound = errors[:, k], uncertainty[:, k]
+            finite = np.isfinite(bound)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(error > 0, error / bound, 0.0)[finite]
+            ratio[np.isnan(ratio)] = np.inf
+            scale = float(np.quantile(ratio, coverage)) if len(ratio) else 1.0
+            # An infinite or undefined scale makes every point of the quantity fall back to a solve
+            scale = max(1.0, scale) if np.isfinite(scale) else np.inf
+            self.surrogate.scale[k] = scale
+            report[quantity] = {
+                "points": int(finite.sum()),
+                "max_error": float(error[finite].max()) if finite.any() else np.nan,
+                "rms_error": float(np.sqrt(np.mean(error[finite] ** 2))) if finite.any() else np.nan,
+                "coverage": float(np.mean(ratio <= 1.0)) if len(ratio) else np.nan,
+                "scale": scale,
+            }
+        return report
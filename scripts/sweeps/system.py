@@ -0,0 +1,238 @@
+# Picklable recipes for the chemical systems used in the tutorial scripts.
+#
+# The scripts build their ChemicalSystem, EquilibriumSpecs and EquilibriumSolver at
+# module level. A sweep needs to be able to rebuild exactly the same objects in
+# another process, so here the system is described by plain strings and numbers
+# and only turned into Reaktoro objects by `SystemDefinition.build()`.
+
+import os
+
+import reaktoro
+from reaktoro import (AggregateState, AqueousPhase, ChemicalProps, ChemicalState, ChemicalSystem, Database,
+                      EquilibriumConditions, EquilibriumOptions, EquilibriumSolver,
+                      EquilibriumSpecs, GaseousPhase, MineralPhase, MineralPhases, Param, PhreeqcDatabase,
+                      SupcrtDatabase, AqueousProps, chain, speciate)
+
+from . import constraints
+from .extractors import SystemIndex
+from .grid import temperature_and_pressure
+from .tables import StandardTable
+
+
+# Databases loaded by this process, keyed by name or (path, size, mtime).
+_databases = {}
+
+def load_database(database):
+    """Load a thermodynamic database from a file path or a built-in database name.
+
+    `databases/phreeqc-extended.dat` is read from disk, `pitzer.dat` is one of the
+    PHREEQC databases shipped with Reaktoro, and anything else (e.g. `supcrtbl`)
+    is taken to be a SUPCRT database. Each database is loaded once per process.
+    """
+    if os.path.isfile(database):
+        stat = os.stat(database)
+        key = (os.path.abspath(database), stat.st_size, stat.st_mtime_ns)
+    else:
+        key = database
+    if key not in _databases:
+        _databases[key] = _load_database(database)
+    return _databases[key]
+
+
+def _load_database(database):
+    if os.path.isfile(database):
+        return PhreeqcDatabase.fromFile(database)
+    if database.endswith(".dat"):
+        return PhreeqcDatabase(database)
+    return SupcrtDatabase(database)
+
+
+def activity_model(description):
+    """Create an activity model from a description such as `"HKF"` or `"Drummond CO2"`."""
+    name, *args = description.split()
+    return getattr(reaktoro, "ActivityModel" + name)(*args)
+
+
+class SystemDefinition:
+    """Everything needed to construct a chemical system and its equilibrium solver.
+
+    The arguments mirror the lines of the scripts, e.g. for the stream model:
+
+        SystemDefinition("databases/phreeqc-extended.dat", "H O C Na Cl Ca P",
+                         minerals="Fluorapatite Hydroxylapatite Calcite")
+
+    `activity_models` is the chain set on the aqueous phase, `specs` lists the
+    EquilibriumSpecs methods to call (`"fugacity CO2"` calls `specs.fugacity("CO2")`,
+    see `constraints.py` for the others) and `epsilon`, if given, is set on the
+    EquilibriumOptions of the solver. `tabulate` is an optional `Tabulation` of the standard Gibbs energies (see
+    `tables.py`). Each entry of `solid_solutions` lists the end members of one
+    ideal solid solution, e.g. `("Calcite Fluorapatite Hydroxylapatite",)` for
+    a single `MineralPhase` holding the three species, whereas `minerals` are
+    pure phases.
+    """
+
+    def __init__(self, database, elements, minerals="", gases="",
+                 activity_models=("HKF", "Drummond CO2"),
+                 gas_activity_model="PengRobinson",
+                 specs=("temperature", "pressure", "fugacity CO2"),
+                 epsilon=None, tabulate=None, solid_solutions=()):
+        self.database = database
+        self.elements = elements
+        self.minerals = minerals
+        self.gases = gases
+        self.activity_models = tuple(activity_models)
+        self.gas_activity_model = gas_activity_model
+        self.specs = tuple(specs)
+        self.epsilon = epsilon
+        self.tabulate = tabulate
+        self.solid_solutions = tuple(solid_solutions)
+
+    def key(self):
+        """Return a hashable tuple identifying the system, its specs and options."""
+        return (self.database, self.elements, self.minerals, self.gases,
+                self.activity_models, self.gas_activity_model, self.specs,
+                self.epsilon, self.tabulate.key() if self.tabulate is not None else None,
+                self.solid_solutions)
+
+    def __eq__(self, other):
+        return isinstance(other, SystemDefinition) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return f"SystemDefinition{self.key()!r}"
+
+    def build(self):
+        """Construct the Reaktoro objects described by this definition."""
+        return EquilibriumSetup(self)
+
+
+class EquilibriumSetup:
+    """The Reaktoro objects of a `SystemDefinition`, built once and reused for every solve.
+
+    With a tabulated definition the species of the system, and the gases the
+    `fugacity` specs refer to, get a constant G0 held in a `Param` per species
+    (`G0`), which `at` sets for each point.
+    """
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.database = load_database(definition.database)
+
+        self.table = None
+        self.G0 = None
+        self.tabulated_at = None
+        if definition.tabulate is not None:
+            species = list(ChemicalSystem(self.database, *self.phases()).species())
+            species += self.fugacity_references(species)
+            self.table = StandardTable.build(species, definition.tabulate)
+            # The species keep sharing these parameters, so setting them changes the G0 the solver sees
+            self.G0 = [Param(float(g)) for g in self.table.G0[:, 0, 0]]
+            self.database = Database([s.withStandardGibbsEnergy(g) for s, g in zip(species, self.G0)])
+
+        self.system = ChemicalSystem(self.database, *self.phases())
+
+        self.specs = EquilibriumSpecs(self.system)
+        constraints.add(self.specs, definition.specs)
+
+        self.solvers = {}
+        self.solver = self.solver_with(definition.epsilon)
+
+        self.conditions = EquilibriumConditions(self.specs)
+        self.props = ChemicalProps(self.system)
+        self.aprops = AqueousProps(self.system)
+        self.index = SystemIndex(self.system, definition.minerals.split())
+
+    def fugacity_references(self, species):
+        """Return the gases of the database, not among `species`, whose fugacity the specs fix.
+
+        `EquilibriumSpecs.fugacity` takes the G0 of its gas from the database of
+        the system, so a tabulated database must contain it too.
+        """
+        gases = self.database.species().withAggregateState(AggregateState.Gas)
+        names = {s.name() for s in species}
+        references = []
+        for spec in self.definition.specs:
+            name, *args = getattr(spec, "spec", spec).split()
+            if name == "fugacity":
+                gas = gases[gases.indexWithFormula(args[0])]
+                if gas.name() not in names:
+                    names.add(gas.name())
+                    references.append(gas)
+        return references
+
+    def phases(self):
+        """Return new Reaktoro phase objects for the phases of the definition."""
+        definition = self.definition
+        solution = AqueousPhase(speciate(definition.elements))
+        solution.setActivityModel(chain(*[activity_model(m) for m in definition.activity_models]))
+        phases = [solution]
+
+        if definition.minerals:
+            phases.append(MineralPhases(definition.minerals))
+
+        for species in definition.solid_solutions:
+            phases.append(MineralPhase(species))
+
+        if definition.gases:
+            gases = GaseousPhase(definition.gases)
+            gases.setActivityModel(activity_model(definition.gas_activity_model))
+            phases.append(gases)
+
+        return phases
+
+    def solver_with(self, epsilon):
+        """Return the solver with `epsilon` set on its options (None for the defaults), built once."""
+        if epsilon not in self.solvers:
+            solver = EquilibriumSolver(self.specs)
+            if epsilon is not None:
+                opts = EquilibriumOptions()
+                opts.epsilon = epsilon
+                solver.setOptions(opts)
+            self.solvers[epsilon] = solver
+        return self.solvers[epsilon]
+
+    def at(self, conditions):
+        """Prepare the setup to solve the point with the (Condition, value) pairs `conditions` and return it.
+
+        With tabulation, the G0 of the species are set to the values
+        interpolated from `table` at the temperature and pressure of the point.
+        """
+        if self.table is not None:
+            T, P = temperature_and_pressure(conditions)
+            if (T, P) != self.tabulated_at:
+                for param, g in zip(self.G0, self.table.interpolate(T, P)):
+                    param.value(float(g))
+                self.tabulated_at = (T, P)
+        return self
+
+    def warm_state(self, state):
+        """Return a copy of `state`, the converged state of another point, to start a solve from."""
+        return ChemicalState(state)
+
+
+class InitialState:
+    """Species amounts (or masses) used to seed each equilibrium calculation.
+
+    Mirrors the `state.set(...)` lines of the scripts:
+
+        InitialState({"H2O": (1.0, "kg"), "Nahcolite": (10.0, "mol"), "CO2": (100.0, "mol")})
+    """
+
+    def __init__(self, amounts):
+        self.amounts = dict(amounts)
+
+    def key(self):
+        """Return a hashable tuple identifying the initial state."""
+        return tuple((name, float(value), unit) for name, (value, unit) in self.amounts.items())
+
+    def __repr__(self):
+        return f"InitialState({self.amounts!r})"
+
+    def build(self, system):
+        """Create a new ChemicalState of `system` with the stored amounts."""
+        state = ChemicalState(system)
+        for name, (value, unit) in self.amounts.items():
+            state.set(name, value, unit)
+        return state
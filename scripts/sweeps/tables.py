@@ -0,0 +1,128 @@
+# Standard Gibbs energies tabulated on a T/P lattice, for sweeps at many temperatures.
+#
+# Reaktoro evaluates the standard properties of every species (for the PHREEQC
+# databases, from the -analytic log K fits and -delta_h terms of the formation
+# reactions) each time the chemical properties are updated, i.e. at every
+# iteration of every solve, even though temperature and pressure are fixed while
+# a grid point is solved. With `SystemDefinition(..., tabulate=Tabulation(...))`
+# the G0 of the species of the system (and of the gases whose fugacity is fixed)
+# are computed once on a T/P lattice, refined until linear interpolation is
+# within a tolerance at the centre of every cell.
+# The species of the single system of the setup then have a constant G0 held in
+# a Reaktoro `Param`, set to the interpolated value before each grid point is
+# solved (see `EquilibriumSetup.at`), so any order of the grid axes works.
+
+import numpy as np
+
+
+def species_properties(species, T, P, properties):
+    """Evaluate `properties` of the Reaktoro `species` at the flat arrays T (K) and P (Pa).
+
+    Reaktoro has no vectorized evaluation of standard properties, so this is
+    one `species.props` call per species and point.
+    """
+    table = {prop: np.empty((len(species), len(T))) for prop in properties}
+    for i, s in enumerate(species):
+        for k, (Tk, Pk) in enumerate(zip(T, P)):
+            props = s.props(Tk, Pk)
+            for prop in properties:
+                table[prop][i, k] = float(getattr(props, prop))
+    return table
+
+
+def lattice(bounds, step):
+    """Return evenly spaced nodes from bounds[0] to bounds[1], at most `step` apart."""
+    lower, upper = map(float, bounds)
+    if upper == lower:
+        return np.array([lower])
+    return np.linspace(lower, upper, max(2, int(np.ceil((upper - lower) / step)) + 1))
+
+
+def midpoints(nodes):
+    return 0.5 * (nodes[1:] + nodes[:-1]) if len(nodes) > 1 else nodes
+
+
+class Tabulation:
+    """Opt-in tabulation of standard Gibbs energies over a T (K) and P (Pa) range.
+
+        SystemDefinition("databases/phreeqc-toner-catling.dat", "H O C Na Cl P",
+                         minerals="Nahcolite Trona Natron",
+                         tabulate=Tabulation(temperatures=(273.15, 323.15)))
+
+    The lattice starts with nodes `temperature_step` K and `pressure_step` Pa
+    apart and is refined until the interpolated G0 of every species is within
+    `tolerance` J/mol of the exact value at every cell centre (1 J/mol is about
+    2e-4 in log K at 25 °C). Only G0 is tabulated: the solved states are exact
+    for the interpolated G0, but quantities computed from H0, V0 or Cp0 of the
+    tabulated system are not meaningful.
+    """
+
+    def __init__(self, temperatures, pressures=(101325.0, 101325.0), tolerance=1.0,
+                 temperature_step=5.0, pressure_step=1e6, max_refinements=6):
+        self.temperatures = tuple(map(float, temperatures))
+        self.pressures = tuple(map(float, pressures))
+        self.tolerance = tolerance
+        self.temperature_step = temperature_step
+        self.pressure_step = pressure_step
+        self.max_refinements = max_refinements
+
+    def key(self):
+        return (self.temperatures, self.pressures, self.tolerance,
+                self.temperature_step, self.pressure_step, self.max_refinements)
+
+    def __repr__(self):
+        return f"Tabulation{self.key()!r}"
+
+
+class StandardTable:
+    """The G0 of a list of species on a T x P lattice, interpolated bilinearly.
+
+    `G0` has shape (len(names), len(temperatures), len(pressures)) and `error` is
+    the largest interpolation error at the cell centres found when building it.
+    """
+
+    def __init__(self, names, temperatures, pressures, G0, error):
+        self.names = list(names)
+        self.temperatures = temperatures
+        self.pressures = pressures
+        self.G0 = G0
+        self.error = error
+
+    @classmethod
+    def build(cls, species, tabulation):
+        """Tabulate the Reaktoro `species` as described by a `Tabulation`."""
+        species = list(species)
+        names = [s.name() for s in species]
+        Tstep, Pstep = tabulation.temperature_step, tabulation.pressure_step
+        for _ in range(tabulation.max_refinements + 1):
+            temperatures = lattice(tabulation.temperatures, Tstep)
+            pressures = lattice(tabulation.pressures, Pstep)
+            T, P = np.meshgrid(temperatures, pressures, indexing="ij")
+            G0 = species_properties(species, T.ravel(), P.ravel(), ["G0"])["G0"]
+            table = cls(names, temperatures, pressures, G0.reshape((len(species),) + T.shape), np.inf)
+
+            T, P = np.meshgrid(midpoints(temperatures), midpoints(pressures), indexing="ij")
+            exact = species_properties(species, T.ravel(), P.ravel(), ["G0"])["G0"]
+            approximate = np.array([table.interpolate(Tk, Pk) for Tk, Pk in zip(T.ravel(), P.ravel())]).T
+            table.error = float(np.max(np.abs(exact - approximate))) if exact.size else 0.0
+            if table.error <= tabulation.tolerance:
+                return table
+            Tstep, Pstep = Tstep / 2, Pstep / 2
+        raise ValueError(f"Standard Gibbs energies could not be tabulated within {tabulation.tolerance} J/mol "
+                         f"(error {table.error:.3g} J/mol after {tabulation.max_refinements} refinements)")
+
+    def interpolate(self, T, P):
+        """Return the G0 (J/mol) of all species at T (K) and P (Pa)."""
+        weights = []
+        for nodes, value, quantity in ((self.temperatures, T, "Temperature"), (self.pressures, P, "Pressure")):
+            if not nodes[0] - 1e-9 <= value <= nodes[-1] + 1e-9:
+                raise ValueError(f"{quantity} {value} is outside the tabulated range [{nodes[0]}, {nodes[-1]}]")
+            if len(nodes) == 1:
+                weights.append((0, 0, 0.0))
+                continue
+            i = min(max(int(np.searchsorted(nodes, value)) - 1, 0), len(nodes) - 2)
+            weights.append((i, i + 1, (value - nodes[i]) / (nodes[i + 1] - nodes[i])))
+        (i0, i1, wT), (j0, j1, wP) = weights
+        G0 = self.G0
+        return ((1 - wT) * ((1 - wP) * G0[:, i0, j0] + wP * G0[:, i0, j1])
+                + wT * ((1 - wP) * G0[:, i1, j0] + wP * G0[:, i1, j1]))
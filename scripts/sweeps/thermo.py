@@ -0,0 +1,66 @@
+# Standard thermodynamic properties of many species over arrays of T and P.
+#
+# Reaktoro evaluates `species.props(T, P)` one point at a time, so comparing
+# databases species by species used to be a nested Python loop per script (see
+# ex-beginner-thermoprops-supcrtbl.py). `standard_properties` keeps that loop
+# (one `props` call per species and point, so in one process it costs the same
+# as the scripts' loops) in one place and returns NumPy arrays. The only speedup
+# is optional: the species can be split over a process pool when the tables get
+# large (thousands of T/P points x hundreds of species).
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .parallel import default_chunksize, pool_context
+from .system import load_database
+from .tables import species_properties
+
+PROPERTIES = ("G0", "H0", "V0", "Cp0")
+
+
+def _species_table(database, names, T, P, properties):
+    """Evaluate `properties` of the species `names` at the flat arrays T and P."""
+    if isinstance(database, str):
+        database = load_database(database)
+    return species_properties([database.species().get(name) for name in names], T, P, properties)
+
+
+def _species_table_chunk(args):
+    return _species_table(*args)
+
+
+def standard_properties(database, species, T, P, properties=PROPERTIES, processes=1):
+    """Return the standard properties of `species` as arrays over T (K) and P (Pa).
+
+    `database` is a database name or path as accepted by `load_database`, or an
+    already loaded Reaktoro database (then only with `processes=1`). `T` and `P`
+    are broadcast against each other, and every returned array has shape
+    `(len(species), *np.broadcast(T, P).shape)`:
+
+        G0 = standard_properties("supcrtbl", ["H2O(g)", "CO2(g)"], T + 273.15, 80e5, ["G0"])["G0"]
+
+    Values are in SI units: J/mol for G0 and H0, m3/mol for V0, J/(mol*K) for Cp0.
+    With several processes, each worker loads the database itself and evaluates
+    a share of the species.
+    """
+    species = list(species)
+    T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+    shape = T.shape
+    T, P = T.ravel(), P.ravel()
+
+    if processes == 1:
+        table = _species_table(database, species, T, P, properties)
+    else:
+        if not isinstance(database, str):
+            raise TypeError("Pass the database by name or path to evaluate it in several processes")
+        processes = processes or os.cpu_count()
+        chunksize = default_chunksize(len(species), processes)
+        chunks = [species[i:i + chunksize] for i in range(0, len(species), chunksize)]
+        with ProcessPoolExecutor(max_workers=processes, mp_context=pool_context()) as pool:
+            tables = list(pool.map(_species_table_chunk,
+                                   [(database, chunk, T, P, properties) for chunk in chunks]))
+        table = {prop: np.concatenate([t[prop] for t in tables]) for prop in properties}
+
+    return {prop: values.reshape((len(species),) + shape) for prop, values in table.items()}
@@ -0,0 +1,125 @@
+# Titrations: adding a reagent step by step and re-equilibrating after each step.
+#
+# ex-ph-dependence-on-contaminants-in-water.py adds 0.1 mmol of HCl (then NH3)
+# fifty times and solves after every addition. A `Titration` starts every step
+# from the previous equilibrium, and with `max_dpH` it adapts the step: a step
+# that changes pH by more than `max_dpH` is retried with half the amount, and
+# after a step that changes pH by less than a quarter of it the next step is
+# doubled. The curve is then resolved finely near the equivalence point and
+# coarsely elsewhere, with far fewer solves than a uniform grid of the smallest
+# step.
+
+import numpy as np
+from reaktoro import ChemicalState
+
+from .extractors import extract, pH
+
+
+class TitrationResult:
+    """Quantities along a titration.
+
+    `amounts` holds the reagent added before each point (0 for the starting
+    state), in the unit of the titration, and `result["pH"]` the pH at each
+    point. `solves` counts all solver calls, including rejected steps.
+    """
+
+    def __init__(self, reagent, unit, amounts, quantities, data, solves):
+        self.reagent = reagent
+        self.unit = unit
+        self.amounts = amounts
+        self.quantities = list(quantities)
+        self.data = data
+        self.solves = solves
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __getitem__(self, quantity):
+        return self.data[self.quantities.index(quantity)]
+
+
+class Titration:
+    """Add `reagent` to an equilibrium state in steps until a stopping criterion is met.
+
+        titration = Titration("HCl(aq)", step=0.1, unit="mmol", max_amount=5.0)
+        result = titration.run(setup, state)
+        result.amounts, result["pH"]
+
+    The titration stops when `max_amount` of reagent has been added, when pH
+    has reached `target_pH`, or after `max_steps` accepted steps, whichever
+    comes first. `max_amount` or `max_steps` must be given, since a reagent
+    may never bring pH to `target_pH`. With `max_dpH=None` every
+    step adds exactly `step`; otherwise steps stay within `min_step` and
+    `max_step` (by default `step / 64` and `16 * step`). `extractors` add
+    quantities next to pH.
+    """
+
+    def __init__(self, reagent, step, unit="mol", max_amount=None, target_pH=None, max_steps=None,
+                 max_dpH=0.1, min_step=None, max_step=None, extractors=()):
+        if max_amount is None and max_steps is None:
+            raise ValueError("A titration needs max_amount or max_steps to stop; "
+                             "target_pH alone may never be reached")
+        self.reagent = reagent
+        self.step = step
+        self.unit = unit
+        self.max_amount = max_amount
+        self.target_pH = target_pH
+        self.max_steps = max_steps
+        self.max_dpH = max_dpH
+        self.min_step = min_step if min_step is not None else step / 64
+        self.max_step = max_step if max_step is not None else 16 * step
+        self.extractors = [pH()] + list(extractors)
+
+    def done(self, amounts, values):
+        if self.max_steps is not None and len(amounts) > self.max_steps:
+            return True
+        if self.max_amount is not None and amounts[-1] >= self.max_amount * (1 - 1e-12):
+            return True
+        if self.target_pH is not None:
+            return (values[-1][0] - self.target_pH) * (values[0][0] - self.target_pH) <= 0
+        return False
+
+    def run(self, setup, state):
+        """Titrate a copy of `state` with the solver and conditions of `setup`.
+
+        The conditions are used as they are, so set them (e.g. temperature and
+        pressure) before calling this.
+        """
+        state = ChemicalState(state)
+        res = setup.solver.solve(state, setup.conditions)
+        solves = 1
+        if not res.optima.succeeded:
+            raise RuntimeError("The starting state of the titration did not converge")
+        amounts = [0.0]
+        values = [extract(self.extractors, setup, state)]
+
+        step = self.step
+        while not self.done(amounts, values):
+            if self.max_amount is not None:
+                step = min(step, self.max_amount - amounts[-1])
+            trial = ChemicalState(state)
+            trial.add(self.reagent, step, self.unit)
+            res = setup.solver.solve(trial, setup.conditions)
+            solves += 1
+
+            dpH = np.nan
+            if res.optima.succeeded:
+                row = extract(self.extractors, setup, trial)
+                dpH = abs(row[0] - values[-1][0])
+            adaptive = self.max_dpH is not None
+            if not res.optima.succeeded or (adaptive and dpH > self.max_dpH and step > self.min_step):
+                if step <= self.min_step or not adaptive:
+                    print(f"The titration with {self.reagent} stopped: no convergence after adding "
+                          f"{amounts[-1] + step} {self.unit}")
+                    break
+                step = max(step / 2, self.min_step)
+                continue
+
+            state = trial
+            amounts.append(amounts[-1] + step)
+            values.append(row)
+            if adaptive and dpH < self.max_dpH / 4:
+                step = min(2 * step, self.max_step)
+
+        names = [extractor.name for extractor in self.extractors]
+        return TitrationResult(self.reagent, self.unit, np.array(amounts), names, np.array(values).T, solves)